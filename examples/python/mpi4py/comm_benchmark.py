@@ -0,0 +1,266 @@
+"""
+MPI Communication Micro-Benchmarks (OSU-style) in Python using mpi4py
+
+Builds on hello_world.py's point-to-point and collective calls and
+measures what they cost:
+1. Ping-pong latency and bandwidth between ranks 0 and 1 across message sizes
+2. Pickle-based lowercase API (send/recv) vs buffer-based uppercase API (Send/Recv)
+3. Bcast / Allreduce / Gather timing, pickled vs buffer, at the current rank count
+
+The pickle/buffer ratio per size shows where the lowercase API's
+serialization overhead starts to hurt.
+
+Run:
+    mpirun -np 2 python comm_benchmark.py                 # ping-pong + collectives
+    mpirun -np 4 python comm_benchmark.py --json out.json
+    python comm_benchmark.py --sweep 2 4 8                # collectives vs rank count
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+
+
+def message_sizes(max_bytes):
+    """Message sizes in bytes: 0, then powers of two up to max_bytes."""
+    sizes = [0]
+    size = 1
+    while size <= max_bytes:
+        sizes.append(size)
+        size *= 2
+    return sizes
+
+
+def iterations_for(nbytes, base=1000):
+    """Fewer iterations for large messages so each size takes similar time."""
+    return max(10, min(base, (64 * 2**20) // max(nbytes, 1)))
+
+
+def pingpong(comm, nbytes, iterations, warmup=10, api="buffer"):
+    """
+    Average one-way latency (seconds) of an nbytes message between ranks 0 and 1.
+
+    Ranks other than 0 and 1 only take part in the barriers. Returns None
+    on ranks other than 0.
+    """
+    from mpi4py import MPI
+
+    rank = comm.Get_rank()
+    message = np.zeros(nbytes, dtype=np.uint8)
+    buffer = np.empty(nbytes, dtype=np.uint8)
+
+    def exchange(first):
+        if api == "buffer":
+            if first:
+                comm.Send(message, dest=1, tag=1)
+                comm.Recv(buffer, source=1, tag=1)
+            else:
+                comm.Recv(buffer, source=0, tag=1)
+                comm.Send(message, dest=0, tag=1)
+        else:
+            if first:
+                comm.send(message, dest=1, tag=1)
+                comm.recv(source=1, tag=1)
+            else:
+                comm.recv(source=0, tag=1)
+                comm.send(message, dest=0, tag=1)
+
+    comm.Barrier()
+    start = 0.0
+    for i in range(warmup + iterations):
+        if i == warmup:
+            start = MPI.Wtime()
+        if rank in (0, 1):
+            exchange(rank == 0)
+    elapsed = MPI.Wtime() - start
+    comm.Barrier()
+    return elapsed / (2 * iterations) if rank == 0 else None
+
+
+def collective(comm, op, nbytes, iterations, warmup=10, api="buffer"):
+    """
+    Average time (seconds) of one collective call, maximum over ranks.
+
+    op is "bcast", "allreduce" or "gather". Messages are float64 arrays
+    of nbytes // 8 elements (at least one). Returns None on ranks other
+    than 0.
+    """
+    from mpi4py import MPI
+
+    rank = comm.Get_rank()
+    size = comm.Get_size()
+    count = max(1, nbytes // 8)
+    send = np.ones(count, dtype=np.float64)
+    recv = np.empty(count, dtype=np.float64)
+    gathered = np.empty(count * size, dtype=np.float64) if rank == 0 else None
+
+    def call():
+        if op == "bcast":
+            if api == "buffer":
+                comm.Bcast(send, root=0)
+            else:
+                comm.bcast(send if rank == 0 else None, root=0)
+        elif op == "allreduce":
+            if api == "buffer":
+                comm.Allreduce(send, recv, op=MPI.SUM)
+            else:
+                comm.allreduce(send, op=MPI.SUM)
+        elif op == "gather":
+            if api == "buffer":
+                comm.Gather(send, gathered, root=0)
+            else:
+                comm.gather(send, root=0)
+        else:
+            raise ValueError(f"Unknown collective {op!r}")
+
+    for _ in range(warmup):
+        call()
+    comm.Barrier()
+    start = MPI.Wtime()
+    for _ in range(iterations):
+        call()
+    elapsed = (MPI.Wtime() - start) / iterations
+    slowest = comm.reduce(elapsed, op=MPI.MAX, root=0)
+    return slowest if rank == 0 else None
+
+
+def run(max_bytes=4 * 2**20, collectives=("bcast", "allreduce", "gather")):
+    """Run every benchmark on COMM_WORLD; returns the report on rank 0."""
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+    report = {"ranks": comm.Get_size(), "pingpong": [], "collectives": []}
+
+    if comm.Get_size() >= 2:
+        for nbytes in message_sizes(max_bytes):
+            iterations = iterations_for(nbytes)
+            row = {"bytes": nbytes}
+            for api in ("pickle", "buffer"):
+                latency = pingpong(comm, nbytes, iterations, api=api)
+                if latency is not None:
+                    row[f"{api}_latency_us"] = latency * 1e6
+                    row[f"{api}_bandwidth_mbs"] = nbytes / latency / 1e6 if latency > 0 else 0.0
+            report["pingpong"].append(row)
+
+    for op in collectives:
+        # Collectives move float64 elements, so start at one element
+        for nbytes in [size for size in message_sizes(max_bytes) if size >= 8]:
+            iterations = iterations_for(nbytes, base=200)
+            row = {"op": op, "bytes": nbytes}
+            for api in ("pickle", "buffer"):
+                elapsed = collective(comm, op, nbytes, iterations, api=api)
+                if elapsed is not None:
+                    row[f"{api}_us"] = elapsed * 1e6
+            report["collectives"].append(row)
+
+    return report if comm.Get_rank() == 0 else None
+
+
+def crossover(rows, pickle_key, buffer_key, ratio):
+    """Smallest message size from which pickle time stays >= ratio x buffer time."""
+    found = None
+    for row in reversed(rows):
+        if row[buffer_key] > 0 and row[pickle_key] / row[buffer_key] >= ratio:
+            found = row["bytes"]
+        else:
+            break
+    return found
+
+
+def print_report(report, ratio=2.0):
+    """Print ping-pong and collective tables in the style of the OSU suite."""
+    if report["pingpong"]:
+        print("# Ping-pong between ranks 0 and 1 (one-way)")
+        print(f"{'Bytes':>10} {'pickle us':>11} {'buffer us':>11} {'pickle MB/s':>12} "
+              f"{'buffer MB/s':>12} {'ratio':>7}")
+        for row in report["pingpong"]:
+            r = row["pickle_latency_us"] / row["buffer_latency_us"] if row["buffer_latency_us"] else 0
+            print(f"{row['bytes']:>10} {row['pickle_latency_us']:>11.2f} "
+                  f"{row['buffer_latency_us']:>11.2f} {row['pickle_bandwidth_mbs']:>12.1f} "
+                  f"{row['buffer_bandwidth_mbs']:>12.1f} {r:>7.2f}")
+        size = crossover(report["pingpong"], "pickle_latency_us", "buffer_latency_us", ratio)
+        print(f"# Pickle >= {ratio:g}x buffer latency from: "
+              f"{size if size is not None else 'never'} bytes\n")
+
+    for op in sorted({row["op"] for row in report["collectives"]}):
+        rows = [row for row in report["collectives"] if row["op"] == op]
+        print(f"# {op} on {report['ranks']} ranks (slowest rank)")
+        print(f"{'Bytes':>10} {'pickle us':>11} {'buffer us':>11} {'ratio':>7}")
+        for row in rows:
+            r = row["pickle_us"] / row["buffer_us"] if row["buffer_us"] else 0
+            print(f"{row['bytes']:>10} {row['pickle_us']:>11.2f} {row['buffer_us']:>11.2f} {r:>7.2f}")
+        size = crossover(rows, "pickle_us", "buffer_us", ratio)
+        print(f"# Pickle >= {ratio:g}x buffer time from: "
+              f"{size if size is not None else 'never'} bytes\n")
+
+
+def sweep(args):
+    """Run the collectives at each rank count in args.sweep (one mpirun each)."""
+    mpirun = shutil.which("mpirun") or shutil.which("mpiexec")
+    if mpirun is None:
+        raise RuntimeError("mpirun not found")
+
+    reports = []
+    for ranks in args.sweep:
+        command = [mpirun, *shlex.split(args.mpirun_args), "-np", str(ranks),
+                   sys.executable, os.path.abspath(__file__),
+                   "--max-size", str(args.max_size), "--stdout-json"]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+
+    for op in ("bcast", "allreduce", "gather"):
+        print(f"# {op}: buffer time (us) by rank count")
+        print(f"{'Bytes':>10}" + "".join(f"{r['ranks']:>10d}" for r in reports))
+        sizes = [row["bytes"] for row in reports[0]["collectives"] if row["op"] == op]
+        for nbytes in sizes:
+            cells = []
+            for r in reports:
+                row = next(x for x in r["collectives"] if x["op"] == op and x["bytes"] == nbytes)
+                cells.append(f"{row['buffer_us']:>10.2f}")
+            print(f"{nbytes:>10}" + "".join(cells))
+        print()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OSU-style mpi4py micro-benchmarks")
+    parser.add_argument("--max-size", type=int, default=4 * 2**20,
+                        help="largest message size in bytes")
+    parser.add_argument("--ratio", type=float, default=2.0,
+                        help="pickle/buffer time ratio that counts as the crossover")
+    parser.add_argument("--json", help="write rank 0's report to this file")
+    parser.add_argument("--stdout-json", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--sweep", type=int, nargs="+",
+                        help="launch mpirun for each rank count and compare collectives")
+    parser.add_argument("--mpirun-args", default="",
+                        help="extra mpirun arguments for --sweep, e.g. '--oversubscribe'")
+    args = parser.parse_args()
+
+    if args.sweep:
+        reports = sweep(args)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(reports, f, indent=2)
+        return
+
+    report = run(args.max_size)
+    if report is None:
+        return
+    if args.stdout_json:
+        print(json.dumps(report))
+        return
+    print_report(report, args.ratio)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"JSON report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Distributed Data Parallelism with mpi4py buffer collectives
+
+The multiply kernel of data_parallel_demo.py (process_chunk), run across
+MPI ranks instead of local processes:
+1. Rank 0 splits a NumPy array with Scatterv (uneven remainders allowed)
+2. Every rank multiplies its own piece
+3. Rank 0 collects the pieces with Gatherv
+
+Uppercase methods (Scatterv, Gatherv) send raw buffers with an explicit
+MPI datatype; the lowercase ones used in hello_world.py pickle Python
+objects, which is far slower for large arrays.
+
+Run one configuration:
+    mpirun -np 4 python data_parallel.py --size 10000000
+
+Strong/weak scaling sweep (launches mpirun once per rank count and
+reports with the scaling harness from modules/01-fundamentals):
+    python data_parallel.py --sweep 1 2 4 --size 10000000
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+
+import numpy as np
+
+
+HARNESS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..",
+                           "modules", "01-fundamentals", "01-parallel-concepts", "examples")
+
+
+def split_counts(n, size):
+    """
+    Element counts and displacements for splitting n items over size ranks.
+
+    The first n % size ranks get one extra element, so pieces differ by
+    at most one.
+    """
+    base, extra = divmod(n, size)
+    counts = [base + (1 if r < extra else 0) for r in range(size)]
+    displs = [sum(counts[:r]) for r in range(size)]
+    return counts, displs
+
+
+def distributed_multiply(comm, data, multiplier, n, root=0, timings=None):
+    """
+    Multiply an array distributed over all ranks of comm.
+
+    Args:
+        comm: MPI communicator
+        data: Float64 array of length n on the root (ignored elsewhere)
+        multiplier: Value to multiply each element by
+        n: Total number of elements (known on every rank)
+        root: Rank that owns the input and receives the output
+        timings: Optional dict that receives this rank's phase times
+
+    Returns:
+        The full result array on the root, None on other ranks
+    """
+    from mpi4py import MPI
+
+    rank = comm.Get_rank()
+    counts, displs = split_counts(n, comm.Get_size())
+
+    t0 = MPI.Wtime()
+    local = np.empty(counts[rank], dtype=np.float64)
+    sendbuf = [data, counts, displs, MPI.DOUBLE] if rank == root else None
+    comm.Scatterv(sendbuf, local, root=root)
+
+    t1 = MPI.Wtime()
+    np.multiply(local, multiplier, out=local)  # process_chunk, numpy backend
+
+    t2 = MPI.Wtime()
+    result = np.empty(n, dtype=np.float64) if rank == root else None
+    recvbuf = [result, counts, displs, MPI.DOUBLE] if rank == root else None
+    comm.Gatherv(local, recvbuf, root=root)
+    t3 = MPI.Wtime()
+
+    if timings is not None:
+        timings.update(scatter=t1 - t0, compute=t2 - t1, gather=t3 - t2)
+    return result
+
+
+def run(size, multiplier=2.5, warmup=1, repeats=5, baseline=False):
+    """
+    Time distributed_multiply on COMM_WORLD.
+
+    Returns (on rank 0 only) a dict with per-repeat samples of the total
+    time and of each phase (max over ranks), plus serial kernel samples
+    if `baseline` is set.
+    """
+    from mpi4py import MPI
+
+    comm = MPI.COMM_WORLD
+    rank = comm.Get_rank()
+    data = np.random.default_rng(42).random(size) if rank == 0 else None
+
+    # Untimed warmup runs; the first one also verifies the result
+    for i in range(warmup):
+        result = distributed_multiply(comm, data, multiplier, size)
+        if rank == 0 and i == 0:
+            assert np.array_equal(result, data * multiplier), "Results don't match!"
+
+    report = {"ranks": comm.Get_size(), "size": size,
+              "total": [], "scatter": [], "compute": [], "gather": []}
+    for _ in range(repeats):
+        timings = {}
+        comm.Barrier()
+        start = MPI.Wtime()
+        distributed_multiply(comm, data, multiplier, size, timings=timings)
+        total = MPI.Wtime() - start
+        for phase in ("scatter", "compute", "gather"):
+            slowest = comm.reduce(timings[phase], op=MPI.MAX, root=0)
+            if rank == 0:
+                report[phase].append(slowest)
+        report["total"].append(total)
+
+    if rank != 0:
+        return None
+    if baseline:
+        serial = []
+        for _ in range(warmup + repeats):
+            start = MPI.Wtime()
+            np.multiply(data, multiplier)
+            serial.append(MPI.Wtime() - start)
+        report["serial"] = serial[warmup:]
+    return report
+
+
+def launch(ranks, size, args, baseline=False):
+    """Run this script under mpirun with `ranks` ranks and return rank 0's report."""
+    mpirun = shutil.which("mpirun") or shutil.which("mpiexec")
+    if mpirun is None:
+        raise RuntimeError("mpirun not found")
+    command = [mpirun, *shlex.split(args.mpirun_args), "-np", str(ranks),
+               sys.executable, os.path.abspath(__file__), "--size", str(size),
+               "--multiplier", str(args.multiplier), "--warmup", str(args.warmup),
+               "--repeats", str(args.repeats), "--json"]
+    if baseline:
+        command.append("--baseline")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def sweep(args):
+    """Strong and weak scaling over args.sweep rank counts."""
+    sys.path.insert(0, os.path.abspath(HARNESS_DIR))
+    from scaling_benchmark import (Measurement, print_report, strong_scaling_report,
+                                   weak_scaling_report)
+
+    base_size = args.size // max(args.sweep)
+    strong_baseline = Measurement(launch(1, args.size, args, baseline=True)["serial"])
+    weak_baseline = Measurement(launch(1, base_size, args, baseline=True)["serial"])
+
+    strong, weak = {}, {}
+    for ranks in args.sweep:
+        strong[ranks] = Measurement(launch(ranks, args.size, args)["total"])
+        weak[ranks] = Measurement(launch(ranks, base_size * ranks, args)["total"])
+
+    print_report("mpi_data_parallel",
+                 strong_scaling_report(strong_baseline, strong, args.size),
+                 weak_scaling_report(weak_baseline, weak, base_size))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scatterv/Gatherv data parallelism")
+    parser.add_argument("--size", type=int, default=10000000)
+    parser.add_argument("--multiplier", type=float, default=2.5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", action="store_true",
+                        help="also time the serial kernel on rank 0")
+    parser.add_argument("--json", action="store_true", help="print rank 0's report as JSON")
+    parser.add_argument("--sweep", type=int, nargs="+",
+                        help="launch mpirun for each rank count and report scaling")
+    parser.add_argument("--mpirun-args", default="",
+                        help="extra mpirun arguments for --sweep, e.g. '--oversubscribe'")
+    args = parser.parse_args()
+
+    if args.sweep:
+        sweep(args)
+        return
+
+    report = run(args.size, args.multiplier, args.warmup, args.repeats, args.baseline)
+    if report is None:
+        return
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print(f"{report['ranks']} ranks, {report['size']:,} elements, "
+          f"median of {args.repeats} runs:")
+    for phase in ("scatter", "compute", "gather", "total"):
+        print(f"  {phase:8s}: {statistics.median(report[phase]):.4f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Hybrid MPI + Node-Local Worker Pool in Python using mpi4py
+
+hello_world.py and data_parallel.py run one MPI rank per core. Production
+codes usually run one rank per node (or per socket) instead, and each
+rank fans out to local workers that share its memory (MPI+OpenMP in C).
+Here each rank drives a local pool:
+1. Rank 0 splits a NumPy array with Scatterv; each rank receives its
+   piece straight into a shared memory segment
+2. The rank's local workers (processes attached to the segment, or
+   threads) multiply sub-slices in place and return partial sums
+3. Rank 0 collects the pieces with Gatherv, and Allreduce combines the
+   partial sums so every rank knows the total
+
+With --workers 1 there is no pool and this is plain flat MPI. Fewer
+ranks means fewer, larger messages per collective; the local workers
+then pay for the pool dispatch instead.
+
+The local pool is started before MPI is initialized, so forking worker
+processes never copies an initialized MPI library. Check that mpirun
+gives every rank enough CPUs for its workers: Open MPI binds each rank to
+one core by default with two or fewer ranks (use --bind-to none or
+--map-by slot:PE=<workers>).
+
+Run one layout:
+    mpirun -np 2 python hybrid.py --workers 2 --size 10000000
+
+Compare every ranks x workers layout with 4 cores in total (flat 4x1,
+hybrid 2x2 and 1x4), launching mpirun once per layout:
+    python hybrid.py --compare 4 --mpirun-args "--oversubscribe --bind-to none"
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import statistics
+import subprocess
+import sys
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from data_parallel import split_counts
+
+
+PHASES = ("scatter", "compute", "gather", "allreduce")
+
+
+def multiply_slice(local, start, end, multiplier):
+    """Multiply local[start:end] in place; return the slice's sum."""
+    piece = local[start:end]
+    np.multiply(piece, multiplier, out=piece)
+    return float(piece.sum())
+
+
+def multiply_segment(name, n, start, end, multiplier):
+    """Process worker: multiply_slice on the rank's shared segment, attached by name."""
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        local = np.ndarray((n,), dtype=np.float64, buffer=shm.buf)
+        result = multiply_slice(local, start, end, multiplier)
+        del local
+    finally:
+        shm.close()
+    return result
+
+
+def start_local_pool(workers, executor="process"):
+    """
+    Worker pool for one rank, or None for flat MPI (one worker).
+
+    Call before the first `from mpi4py import MPI`, so the worker
+    processes are forked before MPI_Init.
+    """
+    if workers <= 1:
+        return None
+    if executor == "thread":
+        return ThreadPool(workers)
+    # Shared by the workers, so attaching to segments is not reported as a leak
+    resource_tracker.ensure_running()
+    return mp.get_context("fork").Pool(workers)
+
+
+def hybrid_multiply(comm, data, multiplier, n, pool=None, workers=1, executor="process",
+                    root=0, timings=None):
+    """
+    Multiply an array distributed over the ranks of comm, and over the
+    local workers of each rank.
+
+    Args:
+        comm: MPI communicator
+        data: Float64 array of length n on the root (ignored elsewhere)
+        multiplier: Value to multiply each element by
+        n: Total number of elements (known on every rank)
+        pool: This rank's pool from start_local_pool (None: compute inline)
+        workers: Number of workers in the pool
+        executor: "process" or "thread", as the pool was started
+        root: Rank that owns the input and receives the output
+        timings: Optional dict that receives this rank's phase times
+
+    Returns:
+        (result array on the root or None elsewhere, sum of the result on
+        every rank)
+    """
+    from mpi4py import MPI
+
+    rank = comm.Get_rank()
+    counts, displs = split_counts(n, comm.Get_size())
+    count = counts[rank]
+
+    # The rank's piece lives in shared memory so process workers can map it
+    shm = shared_memory.SharedMemory(create=True, size=max(count * 8, 1))
+    try:
+        local = np.ndarray((count,), dtype=np.float64, buffer=shm.buf)
+
+        t0 = MPI.Wtime()
+        sendbuf = [data, counts, displs, MPI.DOUBLE] if rank == root else None
+        comm.Scatterv(sendbuf, local, root=root)
+
+        t1 = MPI.Wtime()
+        sub_counts, sub_displs = split_counts(count, workers if pool is not None else 1)
+        slices = [(start, start + size) for start, size in zip(sub_displs, sub_counts)]
+        if pool is None:
+            partials = [multiply_slice(local, start, end, multiplier) for start, end in slices]
+        elif executor == "thread":
+            # np.multiply releases the GIL, so threads run the slices in parallel
+            partials = pool.starmap(multiply_slice,
+                                    [(local, start, end, multiplier) for start, end in slices])
+        else:
+            partials = pool.starmap(multiply_segment,
+                                    [(shm.name, count, start, end, multiplier)
+                                     for start, end in slices],
+                                    chunksize=1)
+
+        t2 = MPI.Wtime()
+        result = np.empty(n, dtype=np.float64) if rank == root else None
+        recvbuf = [result, counts, displs, MPI.DOUBLE] if rank == root else None
+        comm.Gatherv(local, recvbuf, root=root)
+
+        t3 = MPI.Wtime()
+        total = np.empty(1, dtype=np.float64)
+        comm.Allreduce(np.array([sum(partials)], dtype=np.float64), total, op=MPI.SUM)
+        t4 = MPI.Wtime()
+        del local
+    finally:
+        shm.close()
+        shm.unlink()
+
+    if timings is not None:
+        timings.update(scatter=t1 - t0, compute=t2 - t1, gather=t3 - t2, allreduce=t4 - t3)
+    return result, float(total[0])
+
+
+def run(size, workers=1, executor="process", multiplier=2.5, warmup=1, repeats=5):
+    """
+    Time hybrid_multiply on COMM_WORLD.
+
+    Returns (on rank 0 only) a dict with per-repeat samples of the total
+    time and of each phase (max over ranks), and the smallest number of
+    CPUs any rank may run on.
+    """
+    pool = start_local_pool(workers, executor)  # Before MPI_Init
+    try:
+        from mpi4py import MPI
+
+        comm = MPI.COMM_WORLD
+        rank = comm.Get_rank()
+        data = np.random.default_rng(42).random(size) if rank == 0 else None
+        args = (multiplier, size, pool, workers, executor)
+
+        # Untimed warmup runs; the first one also verifies the result
+        for i in range(warmup):
+            result, total = hybrid_multiply(comm, data, *args)
+            if rank == 0 and i == 0:
+                expected = data * multiplier
+                assert np.array_equal(result, expected), "Results don't match!"
+                assert np.isclose(total, expected.sum()), "Sums don't match!"
+
+        cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+        cpus = comm.reduce(cpus, op=MPI.MIN, root=0)
+        report = {"ranks": comm.Get_size(), "workers": workers, "executor": executor,
+                  "size": size, "cpus_per_rank": cpus, "total": []}
+        report.update({phase: [] for phase in PHASES})
+        for _ in range(repeats):
+            timings = {}
+            comm.Barrier()
+            start = MPI.Wtime()
+            hybrid_multiply(comm, data, *args, timings=timings)
+            elapsed = MPI.Wtime() - start
+            for phase in PHASES:
+                slowest = comm.reduce(timings[phase], op=MPI.MAX, root=0)
+                if rank == 0:
+                    report[phase].append(slowest)
+            report["total"].append(elapsed)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return report if rank == 0 else None
+
+
+def layouts(cores):
+    """(ranks, workers) pairs using exactly `cores` cores, flat MPI first."""
+    return [(cores // workers, workers) for workers in range(1, cores + 1)
+            if cores % workers == 0]
+
+
+def launch(ranks, workers, args):
+    """Run this script under mpirun with one layout and return rank 0's report."""
+    mpirun = shutil.which("mpirun") or shutil.which("mpiexec")
+    if mpirun is None:
+        raise RuntimeError("mpirun not found")
+    command = [mpirun, *shlex.split(args.mpirun_args), "-np", str(ranks),
+               sys.executable, os.path.abspath(__file__), "--size", str(args.size),
+               "--workers", str(workers), "--executor", args.executor,
+               "--multiplier", str(args.multiplier), "--warmup", str(args.warmup),
+               "--repeats", str(args.repeats), "--json"]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def print_report(report, repeats):
+    print(f"{report['ranks']} ranks x {report['workers']} {report['executor']} workers, "
+          f"{report['size']:,} elements, median of {repeats} runs:")
+    for phase in PHASES + ("total",):
+        print(f"  {phase:9s}: {statistics.median(report[phase]):.4f} seconds")
+    warn_if_oversubscribed(report)
+
+
+def warn_if_oversubscribed(report):
+    if report["workers"] > 1 and report["cpus_per_rank"] < report["workers"]:
+        print(f"  Warning: a rank may only use {report['cpus_per_rank']} CPU(s) for "
+              f"{report['workers']} workers; launch with --bind-to none or "
+              f"--map-by slot:PE={report['workers']}")
+
+
+def compare(args):
+    """Flat MPI vs every hybrid layout at args.compare cores in total."""
+    print(f"{args.compare} cores, {args.size:,} elements, {args.executor} workers, "
+          f"median of {args.repeats} runs (seconds):")
+    header = "  layout       | " + " | ".join(f"{phase:>9s}" for phase in PHASES + ("total",))
+    print(header + " | vs flat")
+    print("  " + "-" * (len(header) + 8))
+    flat = None
+    for ranks, workers in layouts(args.compare):
+        report = launch(ranks, workers, args)
+        medians = [statistics.median(report[phase]) for phase in PHASES + ("total",)]
+        flat = flat or medians[-1]
+        layout = f"{ranks} x {workers}" + (" (flat)" if workers == 1 else "")
+        print(f"  {layout:12s} | " + " | ".join(f"{m:9.4f}" for m in medians)
+              + f" | {flat / medians[-1]:6.2f}x")
+        warn_if_oversubscribed(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid MPI + local worker pool")
+    parser.add_argument("--size", type=int, default=10000000)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="local workers per rank (1: flat MPI)")
+    parser.add_argument("--executor", choices=("process", "thread"), default="process")
+    parser.add_argument("--multiplier", type=float, default=2.5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print rank 0's report as JSON")
+    parser.add_argument("--compare", type=int, metavar="CORES",
+                        help="launch mpirun for every ranks x workers layout of CORES cores")
+    parser.add_argument("--mpirun-args", default="",
+                        help="extra mpirun arguments for --compare, e.g. '--oversubscribe'")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args)
+        return
+
+    report = run(args.size, args.workers, args.executor, args.multiplier,
+                 args.warmup, args.repeats)
+    if report is None:
+        return
+    if args.json:
+        print(json.dumps(report))
+        return
+    print_report(report, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+CPU Affinity and NUMA-Aware Worker Placement
+
+By default the OS scheduler may move a worker to any core at any time.
+On a multi-socket node it can then run on one socket while its memory
+sits on the other, and every access crosses the interconnect.
+
+A placement policy pins each worker to one CPU with os.sched_setaffinity
+(like OMP_PROC_BIND / OMP_PLACES):
+
+- "compact": fill the physical cores of one NUMA node before moving to
+  the next, then hyperthread siblings (OpenMP "close")
+- "scatter": deal workers round-robin across nodes and sockets
+  (OpenMP "spread"), giving each one more memory bandwidth
+- a list of CPU ids: worker i runs on cpus[i % len(cpus)]
+
+Linux places a page on the node of the CPU that first writes it (first
+touch), so data a pinned worker allocates itself stays local. Affinity
+is only available on Linux; elsewhere placement is a no-op and the
+reported affinity is None.
+"""
+
+import glob
+import os
+import time
+import multiprocessing as mp
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+
+# Named placement policies; an explicit list of CPU ids is also accepted
+PLACEMENTS = ("compact", "scatter")
+
+Placement = Union[str, Sequence[int], None]
+
+
+class Cpu(NamedTuple):
+    """One logical CPU and where it sits."""
+    cpu: int
+    node: int
+    package: int
+    core: int
+
+
+def affinity_supported() -> bool:
+    """True if this platform can pin processes (Linux)."""
+    return hasattr(os, "sched_setaffinity")
+
+
+def parse_cpulist(text: str) -> List[int]:
+    """Parse a kernel CPU list such as "0-3,8-11"."""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def _read_int(path: str, default: int) -> int:
+    try:
+        with open(path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return default
+
+
+def cpu_topology() -> List[Cpu]:
+    """
+    The CPUs this process may use, with NUMA node, socket and core ids.
+
+    Read from /sys on Linux; elsewhere (or without /sys) every CPU is
+    reported as its own core on node 0.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(os.cpu_count() or 1))
+    node_of = {}
+    for path in glob.glob("/sys/devices/system/node/node[0-9]*/cpulist"):
+        node = int(os.path.basename(os.path.dirname(path))[4:])
+        with open(path) as f:
+            for cpu in parse_cpulist(f.read()):
+                node_of[cpu] = node
+    topology = []
+    for cpu in allowed:
+        base = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        topology.append(Cpu(cpu, node_of.get(cpu, 0),
+                            _read_int(f"{base}/physical_package_id", 0),
+                            _read_int(f"{base}/core_id", cpu)))
+    return topology
+
+
+def placement_cpus(num_workers: int, placement: Placement) -> List[Optional[int]]:
+    """
+    CPU for each worker under a placement (None entries: do not pin).
+
+    Workers beyond the number of CPUs wrap around.
+    """
+    if placement is None:
+        return [None] * num_workers
+    if not isinstance(placement, str):
+        cpus = list(placement)
+        if not cpus:
+            raise ValueError("An explicit placement needs at least one CPU")
+        allowed = current_affinity()
+        if allowed is not None:
+            outside = sorted(set(cpus) - set(allowed))
+            if outside:
+                raise ValueError(f"Placement CPUs {outside} are not available to this "
+                                 f"process (allowed: {allowed})")
+        return [cpus[i % len(cpus)] for i in range(num_workers)]
+    if placement not in PLACEMENTS:
+        raise ValueError(f"Unknown placement {placement!r}, expected one of {PLACEMENTS} "
+                         "or a list of CPU ids")
+
+    topology = cpu_topology()
+    # Hyperthread siblings share a (package, core); rank 0 is the first one
+    rank, seen = {}, {}
+    for c in sorted(topology):
+        key = (c.package, c.core)
+        rank[c.cpu] = seen.get(key, 0)
+        seen[key] = rank[c.cpu] + 1
+    # compact: physical cores of node 0, then of node 1, ..., then siblings
+    order = sorted(topology, key=lambda c: (rank[c.cpu], c.node, c.package, c.core, c.cpu))
+    if placement == "scatter":
+        groups = {}
+        for c in order:
+            groups.setdefault((c.node, c.package), []).append(c)
+        lists = list(groups.values())
+        order = [lst[i] for i in range(max(map(len, lists))) for lst in lists if i < len(lst)]
+    cpus = [c.cpu for c in order]
+    return [cpus[i % len(cpus)] for i in range(num_workers)]
+
+
+def current_affinity() -> Optional[List[int]]:
+    """CPUs the calling process may run on (None where unsupported)."""
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    return sorted(os.sched_getaffinity(0))
+
+
+def pin_current_process(cpu: Optional[int]) -> Optional[List[int]]:
+    """
+    Restrict the calling process to one CPU (no-op for None or where
+    unsupported).
+
+    Returns:
+        The resulting affinity, as current_affinity()
+    """
+    if cpu is not None and affinity_supported():
+        os.sched_setaffinity(0, {cpu})
+    return current_affinity()
+
+
+def pin_pool_worker(cpus: List[Optional[int]], counter, reports) -> None:
+    """
+    mp.Pool initializer: pin this worker to the next CPU of the plan.
+
+    Pool workers do not know their index, so they take one from a shared
+    counter, then report (name, affinity) on `reports`. A failure to pin
+    is reported as (name, exception) instead of raised: mp.Pool would
+    replace the failed worker forever and the parent would never hear.
+    """
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    try:
+        affinity = pin_current_process(cpus[index % len(cpus)] if cpus else None)
+    except OSError as exc:
+        affinity = exc
+    reports.put((mp.current_process().name, affinity))
+
+
+def format_affinity(affinity: Dict[str, Optional[List[int]]]) -> str:
+    """One-line "worker: cpus" summary of an affinity map."""
+    if not affinity:
+        return "(none)"
+    nodes = {c.cpu: c.node for c in cpu_topology()}
+
+    def describe(cpus: Optional[List[int]]) -> str:
+        if cpus is None:
+            return "n/a"
+        if len(cpus) == 1:
+            return f"cpu {cpus[0]} (node {nodes.get(cpus[0], 0)})"
+        return f"{len(cpus)} cpus"
+
+    return ", ".join(f"{name}: {describe(cpus)}" for name, cpus in sorted(affinity.items()))
+
+
+def benchmark_placements(data_size: int = 4000000, num_workers: Optional[int] = None,
+                         placements: Sequence[Placement] = (None, "compact", "scatter"),
+                         repeats: int = 3) -> Dict[str, Dict[str, object]]:
+    """
+    Time the shared-memory data plane under each placement.
+
+    With a pinned pool, parallel_processing lets the workers first-touch
+    the input segment, and they are the first to write the output
+    segment, so pages land on the node of the worker that uses them.
+
+    Returns:
+        Mapping of placement label to median time and the pool's
+        affinity map
+    """
+    from data_parallel_demo import np, parallel_processing
+    from input_generation import generate_data
+    from scaling_benchmark import measure
+    from worker_pool import WorkerPool
+
+    backend = "numpy" if np is not None else "python"
+    num_workers = num_workers or mp.cpu_count()
+    report = {}
+    for placement in placements:
+        if placement is None:
+            label = "unpinned"
+        else:
+            label = placement if isinstance(placement, str) else "explicit"
+        with WorkerPool(num_workers, placement=placement) as pool:
+            data = generate_data(data_size, backend=backend, pool=pool)
+            args = (data, 2.5, num_workers, backend, "shared", pool)
+            report[label] = {
+                "time": measure(parallel_processing, args, warmup=1, repeats=repeats).median,
+                "affinity": pool.affinity,
+            }
+    return report
+
+
+def demonstrate_affinity():
+    """Show the topology, the placement plans and their timings."""
+    print("=" * 60)
+    print("CPU AFFINITY AND NUMA PLACEMENT")
+    print("=" * 60)
+
+    topology = cpu_topology()
+    nodes = sorted({c.node for c in topology})
+    print(f"\nUsable CPUs: {len(topology)} on NUMA nodes {nodes} "
+          f"(pinning {'supported' if affinity_supported() else 'not supported'})")
+    workers = max(2, len(topology))
+    for placement in PLACEMENTS:
+        print(f"   {placement:8s} plan for {workers} workers: {placement_cpus(workers, placement)}")
+
+    print("\nShared-memory data parallelism by placement:")
+    start = time.perf_counter()
+    for label, stats in benchmark_placements().items():
+        print(f"   {label:8s} | {stats['time']:.4f} s | {format_affinity(stats['affinity'])}")
+    print(f"   ({time.perf_counter() - start:.1f} s total)")
+    print("\n   On a multi-socket node, compare scatter (more memory bandwidth)")
+    print("   with compact (shared caches) as the worker count grows.")
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+    demonstrate_affinity()
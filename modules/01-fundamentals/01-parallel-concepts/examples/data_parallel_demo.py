@@ -8,13 +8,81 @@ on different data elements simultaneously.
 Data parallelism: Same operation on different data
 """
 
+import os
+import sys
 import time
+import threading
 import multiprocessing as mp
-import random
-from typing import List, Tuple
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
+from affinity import format_affinity
+from input_generation import generate_data
+from scaling_benchmark import measure, print_report, strong_scaling, weak_scaling
+from tracing import Tracer, timed_call, trace_span
+from verification import ChunkDigest, Digest, digest_chunk, digest_result
+from worker_pool import EXECUTORS, WorkerPool, check_executor, free_threaded_build, gil_enabled
 
-def process_chunk(data_chunk: List[float], multiplier: float) -> List[float]:
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the "python" backend needs only the stdlib
+    np = None
+
+
+# Compute backends understood by process_chunk and friends
+BACKENDS = ("python", "numpy")
+
+# Data planes understood by parallel_processing
+MODES = ("copy", "shared")
+
+# Loop schedules understood by parallel_processing, named as in OpenMP
+SCHEDULES = ("static", "dynamic", "guided", "auto")
+
+# Default chunk count per worker for "static,N"-less dynamic schedules
+DYNAMIC_CHUNKS_PER_WORKER = 8
+
+# Busy-work iterations per unit of input value in irregular_chunk
+IRREGULAR_COST = 100
+
+
+def check_backend(backend: str) -> None:
+    """Raise if the requested backend is unknown or unavailable."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "numpy" and np is None:
+        raise ImportError("The 'numpy' backend requires NumPy (pip install numpy)")
+
+
+def as_backend_data(data: Sequence[float], backend: str = "python"):
+    """
+    Convert data to the native container of a backend.
+    
+    The "python" backend works on lists of floats, the "numpy" backend on
+    contiguous float64 arrays (no copy if data already is one).
+    """
+    check_backend(backend)
+    if backend == "numpy":
+        return np.ascontiguousarray(data, dtype=np.float64)
+    return data if isinstance(data, list) else list(data)
+
+
+def results_match(a, b) -> bool:
+    """Compare two results produced by any backend."""
+    if np is not None and (isinstance(a, np.ndarray) or isinstance(b, np.ndarray)):
+        return bool(np.array_equal(a, b))
+    return a == b
+
+
+def process_chunk(data_chunk: List[float], multiplier: float,
+                  backend: str = "python") -> List[float]:
     """
     Process a chunk of data by multiplying each element.
     
@@ -24,74 +92,796 @@ def process_chunk(data_chunk: List[float], multiplier: float) -> List[float]:
     Args:
         data_chunk: List of numbers to process
         multiplier: Value to multiply each element by
+        backend: "python" (list comprehension) or "numpy" (vectorized)
         
     Returns:
-        Processed chunk
+        Processed chunk (a list, or a float64 array for the numpy backend)
     """
+    if backend == "numpy":
+        # One vectorized multiply over a contiguous buffer: no per-element
+        # interpreter overhead and no boxed floats
+        return np.multiply(as_backend_data(data_chunk, backend), multiplier)
     return [x * multiplier for x in data_chunk]
 
 
-def sequential_processing(data: List[float], multiplier: float) -> List[float]:
+def irregular_chunk(data_chunk: List[float], multiplier: float,
+                    backend: str = "python") -> List[float]:
+    """
+    Same result as process_chunk, with a per-element cost that varies.
+    
+    Element x first spins for about IRREGULAR_COST * x iterations. With
+    inputs rising along the array (e.g. i / n), a static split hands the
+    last worker most of the work: a load-imbalanced kernel for comparing
+    schedules.
+    """
+    result = []
+    for x in data_chunk:
+        spin = 0
+        for _ in range(int(x * IRREGULAR_COST)):
+            spin += 1
+        result.append(x * multiplier)
+    if backend == "numpy":
+        return np.array(result, dtype=np.float64)
+    return result
+
+
+def sequential_processing(data: List[float], multiplier: float,
+                          backend: str = "python") -> List[float]:
     """Process data sequentially (baseline for comparison)."""
-    return process_chunk(data, multiplier)
+    return process_chunk(as_backend_data(data, backend), multiplier, backend)
 
 
-def parallel_processing(data: List[float], multiplier: float, num_workers: int = 4) -> List[float]:
+def chunk_bounds(n: int, num_workers: int) -> List[Tuple[int, int]]:
+    """
+    Split range(n) into num_workers contiguous (start, end) pieces.
+    
+    The remainder is added to the last chunk, matching the original
+    static partitioning of parallel_processing.
+    """
+    chunk_size = n // num_workers
+    bounds = []
+    for i in range(num_workers):
+        start = i * chunk_size
+        end = (i + 1) * chunk_size if i < num_workers - 1 else n
+        bounds.append((start, end))
+    return bounds
+
+
+def parse_schedule(schedule: str) -> Tuple[str, Optional[int]]:
+    """
+    Parse an OpenMP-style schedule: "kind" or "kind,chunk" (as in OMP_SCHEDULE).
+    
+    Returns:
+        (kind, chunk size or None)
+    """
+    kind, _, chunk = schedule.partition(",")
+    kind = kind.strip().lower()
+    if kind not in SCHEDULES:
+        raise ValueError(f"Unknown schedule {kind!r}, expected one of {SCHEDULES}")
+    if not chunk.strip():
+        return kind, None
+    if kind == "auto":
+        raise ValueError("The 'auto' schedule picks its own chunk size")
+    chunk_size = int(chunk)
+    if chunk_size < 1:
+        raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+    return kind, chunk_size
+
+
+def schedule_ranges(n: int, num_workers: int, kind: str = "static",
+                    chunk_size: Optional[int] = None) -> List[List[Tuple[int, int]]]:
+    """
+    Split range(n) into tasks for a loop schedule.
+    
+    Each task is the list of (start, end) ranges one worker call
+    processes; the pool hands tasks to whichever worker is idle.
+    
+    - static: one task per worker. Without chunk_size these are the
+      contiguous blocks of chunk_bounds; with it, blocks of chunk_size are
+      dealt round-robin (OpenMP schedule(static, chunk))
+    - dynamic: one task per block of chunk_size (default: n split into
+      DYNAMIC_CHUNKS_PER_WORKER blocks per worker)
+    - guided: blocks of ceil(remaining / num_workers), shrinking as the
+      loop drains, but never below chunk_size (default 1)
+    """
+    if kind == "static" and chunk_size is None:
+        return [[bounds] for bounds in chunk_bounds(n, num_workers)]
+    
+    if kind == "guided":
+        min_chunk = chunk_size or 1
+        tasks = []
+        start = 0
+        while start < n:
+            size = max(min_chunk, -(-(n - start) // num_workers))
+            tasks.append([(start, min(start + size, n))])
+            start += size
+        return tasks
+    
+    chunk_size = chunk_size or max(1, -(-n // (DYNAMIC_CHUNKS_PER_WORKER * num_workers)))
+    blocks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    if kind == "static":
+        return [blocks[w::num_workers] for w in range(num_workers) if blocks[w::num_workers]]
+    if kind == "dynamic":
+        return [[block] for block in blocks]
+    raise ValueError(f"Schedule {kind!r} has no fixed partition")
+
+
+def process_chunks(chunks: List, multiplier: float, backend: str = "python",
+                   kernel: Callable = process_chunk) -> list:
+    """Worker side of a scheduled task: apply kernel to each of its chunks."""
+    return [kernel(chunk, multiplier, backend) for chunk in chunks]
+
+
+def process_digested_chunks(chunks: List, starts: List[int], multiplier: float,
+                            backend: str = "python", kernel: Callable = process_chunk,
+                            tolerance: Optional[float] = None) -> Tuple[list, List[ChunkDigest]]:
+    """Worker side of a verified task: the outputs plus a digest of each."""
+    outputs = process_chunks(chunks, multiplier, backend, kernel)
+    return outputs, [digest_chunk(output, start, tolerance)
+                     for start, output in zip(starts, outputs)]
+
+
+def run_starmap(func: Callable, args: List[tuple], num_workers: int,
+                pool: Optional[WorkerPool] = None,
+                tracer: Optional[Tracer] = None,
+                executor: str = "process") -> list:
+    """
+    Run func over args on a warm WorkerPool, or on a fresh mp.Pool.
+    
+    Without a pool every call pays process startup, which is what the
+    original demo measured; passing a WorkerPool keeps that cost out of
+    the timed region.
+    
+    With executor="thread" the calls run on a ThreadPoolExecutor in this
+    process instead (arguments are passed by reference; `pool` is not
+    used).
+    
+    With a tracer, pool startup and dispatch are recorded as parent
+    phases and each call's compute time as a span on its worker.
+    """
+    if tracer is not None:
+        func = partial(timed_call, func)
+    
+    # One task per message, so idle workers pick up the next task (the
+    # default chunksize would batch consecutive tasks, defeating dynamic
+    # and guided schedules)
+    if executor == "thread":
+        with trace_span(tracer, "pool_start"):
+            threads = ThreadPoolExecutor(max_workers=num_workers)
+        try:
+            with trace_span(tracer, "dispatch"):
+                results = [future.result() for future in
+                           [threads.submit(func, *call_args) for call_args in args]]
+        finally:
+            with trace_span(tracer, "pool_stop"):
+                threads.shutdown()
+    elif pool is not None:
+        with trace_span(tracer, "dispatch"):
+            results = pool.starmap(func, args, chunksize=1)
+    else:
+        with trace_span(tracer, "pool_start"):
+            fresh_pool = mp.Pool(processes=num_workers)
+        try:
+            with trace_span(tracer, "dispatch"):
+                results = fresh_pool.starmap(func, args, chunksize=1)
+        finally:
+            with trace_span(tracer, "pool_stop"):
+                fresh_pool.terminate()
+    
+    if tracer is None:
+        return results
+    for chunk, (_, timing) in enumerate(results):
+        tracer.add_worker_span(timing, chunk=chunk)
+    return [result for result, _ in results]
+
+
+def process_shared_chunk(in_name: str, out_name: str, start: int, end: int,
+                         multiplier: float, backend: str = "python",
+                         kernel: Callable = process_chunk,
+                         digest: bool = False, tolerance: Optional[float] = None):
+    """
+    Worker side of the shared-memory data plane.
+    
+    Attaches to the input and output segments by name, maps views of
+    [start, end) by offset and writes the result in place. Only the
+    segment names and offsets cross the process boundary.
+    
+    Returns:
+        Number of elements processed, or with `digest` the ChunkDigest of
+        the written output (which carries the count)
+    """
+    in_shm = shared_memory.SharedMemory(name=in_name)
+    out_shm = shared_memory.SharedMemory(name=out_name)
+    try:
+        if backend == "numpy":
+            src = np.ndarray((end - start,), dtype=np.float64,
+                             buffer=in_shm.buf, offset=start * 8)
+            dst = np.ndarray((end - start,), dtype=np.float64,
+                             buffer=out_shm.buf, offset=start * 8)
+            if kernel is process_chunk:
+                np.multiply(src, multiplier, out=dst)
+            else:
+                dst[:] = kernel(src, multiplier, backend)
+            result = digest_chunk(dst, start, tolerance) if digest else end - start
+            del src, dst
+        else:
+            src = in_shm.buf.cast("d")
+            dst = out_shm.buf.cast("d")
+            output = array("d", kernel(src[start:end], multiplier, backend))
+            dst[start:end] = output
+            result = digest_chunk(output, start, tolerance) if digest else end - start
+            src.release()
+            dst.release()
+    finally:
+        in_shm.close()
+        out_shm.close()
+    return result
+
+
+def process_shared_ranges(in_name: str, out_name: str, ranges: List[Tuple[int, int]],
+                          multiplier: float, backend: str = "python",
+                          kernel: Callable = process_chunk,
+                          digest: bool = False, tolerance: Optional[float] = None):
+    """
+    Worker side of a scheduled shared-memory task: every range in turn.
+    
+    Returns the element count, or with `digest` a ChunkDigest per range.
+    """
+    results = [process_shared_chunk(in_name, out_name, start, end, multiplier, backend,
+                                    kernel, digest, tolerance)
+               for start, end in ranges]
+    return results if digest else sum(results)
+
+
+def touch_shared_ranges(name: str, ranges: List[Tuple[int, int]]) -> int:
+    """
+    Worker side of first touch: write zeros over [start, end) ranges of a
+    fresh segment, so Linux places those pages on this worker's NUMA node.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        for start, end in ranges:
+            shm.buf[start * 8:end * 8] = bytes((end - start) * 8)
+    finally:
+        shm.close()
+    return sum(end - start for start, end in ranges)
+
+
+def _shared_parallel_processing(data, multiplier: float, num_workers: int,
+                                backend: str, pool: Optional[WorkerPool],
+                                tracer: Optional[Tracer],
+                                tasks: List[List[Tuple[int, int]]],
+                                kernel: Callable,
+                                digests: Optional[Digest] = None):
+    """Run parallel_processing with mode="shared" (see there)."""
+    n = len(data)
+    if n == 0:
+        return as_backend_data([], backend)
+    
+    nbytes = n * 8
+    in_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    out_shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        # With pinned workers, each first-touches the input pages of its
+        # task; the parent's copy then fills pages already on their nodes.
+        # (mp.Pool does not promise the same worker gets the same task
+        # again, but with one task per worker it usually does.)
+        if pool is not None and pool.placement is not None:
+            with trace_span(tracer, "first_touch"):
+                pool.starmap(touch_shared_ranges, [(in_shm.name, ranges) for ranges in tasks],
+                             chunksize=1)
+        
+        # Single copy of the input into the shared segment
+        with trace_span(tracer, "copy_in"):
+            if backend == "numpy":
+                src = np.ndarray((n,), dtype=np.float64, buffer=in_shm.buf)
+                src[:] = data
+                del src
+            else:
+                src = in_shm.buf.cast("d")
+                src[:n] = array("d", data)
+                src.release()
+        
+        # Workers receive (name, offset) descriptors instead of data
+        verify = digests is not None
+        results = run_starmap(process_shared_ranges,
+                              [(in_shm.name, out_shm.name, ranges, multiplier, backend, kernel,
+                                verify, digests.tolerance if verify else None)
+                               for ranges in tasks],
+                              num_workers, pool, tracer)
+        if verify:
+            for task_digests in results:
+                for chunk in task_digests:
+                    digests.add(chunk)
+        
+        # Single copy of the output back into caller-owned memory
+        with trace_span(tracer, "copy_out"):
+            if backend == "numpy":
+                dst = np.ndarray((n,), dtype=np.float64, buffer=out_shm.buf)
+                result = dst.copy()
+                del dst
+            else:
+                dst = out_shm.buf.cast("d")
+                result = dst[:n].tolist()
+                dst.release()
+        return result
+    finally:
+        for shm in (in_shm, out_shm):
+            shm.close()
+            shm.unlink()
+
+
+def parallel_processing(data: List[float], multiplier: float, num_workers: int = 4,
+                        backend: str = "python", mode: str = "copy",
+                        pool: Optional[WorkerPool] = None,
+                        tracer: Optional[Tracer] = None,
+                        schedule: str = "static",
+                        kernel: Callable = process_chunk,
+                        executor: str = "process",
+                        digests: Optional[Digest] = None) -> List[float]:
     """
     Process data in parallel using multiple processes.
     
     This demonstrates data parallelism by dividing the data into chunks
     and processing each chunk independently.
+    
+    With backend="numpy" the chunks are slices of one float64 array, which
+    pickle as a single raw buffer instead of a million boxed floats.
+    
+    Modes:
+        "copy": slice the input, pickle each chunk to a worker and
+            concatenate the returned chunks (at least four copies)
+        "shared": place input and output in multiprocessing.shared_memory
+            segments; workers map views by offset and write results in place
+    
+    Pass a warm WorkerPool as `pool` to reuse its processes instead of
+    spawning a new mp.Pool for this call. If it was created with a
+    placement (see affinity.py), its workers are pinned and, in shared
+    mode, first-touch the input pages they will read.
+    
+    Pass a Tracer as `tracer` to record partitioning, pool startup,
+    dispatch, concatenation and per-worker compute spans (see tracing.py).
+    
+    Schedules (OpenMP-style "kind" or "kind,chunk", see schedule_ranges):
+        "static": one contiguous chunk per worker, the original split
+        "static,N": chunks of N elements dealt round-robin to workers
+        "dynamic,N": chunks of N elements taken by whichever worker is idle
+        "guided,N": dynamic, with chunks shrinking from n / num_workers to N
+        "auto": dynamic with the chunk size picked by tune_chunk_size
+    
+    `kernel` replaces process_chunk (same signature), e.g. irregular_chunk.
+    
+    Executors:
+        "process": worker processes (the default; see `mode` and `pool`)
+        "thread": a ThreadPoolExecutor in this process. Chunks are passed
+            by reference, so nothing is pickled and `mode` does not apply
+            (numpy chunks are views, not copies). Threads only run in
+            parallel while the kernel releases the GIL (NumPy ufuncs on
+            large arrays do) or on a free-threaded interpreter.
+    
+    Pass a Digest as `digests` to have each worker also return a digest
+    of every chunk it produced (see verification.py), so the result can
+    be checked against a reference without a second full output.
+    
+    For inputs that do not fit in memory, see streaming_demo.stream_processing.
     """
-    # Divide data into chunks for each worker
-    chunk_size = len(data) // num_workers
-    chunks = []
-    for i in range(num_workers):
-        start = i * chunk_size
-        end = (i + 1) * chunk_size if i < num_workers - 1 else len(data)
-        chunks.append(data[start:end])
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    check_executor(executor)
+    if executor == "thread":
+        mode = "copy"  # Threads share memory already; chunks are just slices
+    kind, chunk_size = parse_schedule(schedule)
+    with trace_span(tracer, "convert"):
+        data = as_backend_data(data, backend)
+    
+    if kind == "auto":
+        with trace_span(tracer, "tune"):
+            kind = "dynamic"
+            chunk_size = tune_chunk_size(data, multiplier, num_workers, backend, pool,
+                                         kernel, executor=executor)["chunk_size"]
     
-    # Create pool of workers
-    with mp.Pool(processes=num_workers) as pool:
-        # Apply same function to each chunk (data parallelism)
-        results = pool.starmap(process_chunk, [(chunk, multiplier) for chunk in chunks])
+    # Divide data into chunks for each task
+    with trace_span(tracer, "partition"):
+        tasks = schedule_ranges(len(data), num_workers, kind, chunk_size)
+        if mode == "copy":
+            chunks = [[data[start:end] for start, end in ranges] for ranges in tasks]
     
-    # Combine results
-    return [item for sublist in results for item in sublist]
+    if mode == "shared":
+        return _shared_parallel_processing(data, multiplier, num_workers, backend, pool,
+                                           tracer, tasks, kernel, digests)
+    
+    # Apply same function to each chunk (data parallelism)
+    if digests is None:
+        results = run_starmap(process_chunks,
+                              [(task_chunks, multiplier, backend, kernel) for task_chunks in chunks],
+                              num_workers, pool, tracer, executor)
+    else:
+        results = []
+        for outputs, task_digests in run_starmap(
+                process_digested_chunks,
+                [(task_chunks, [start for start, _ in ranges], multiplier, backend, kernel,
+                  digests.tolerance) for task_chunks, ranges in zip(chunks, tasks)],
+                num_workers, pool, tracer, executor):
+            results.append(outputs)
+            for chunk in task_digests:
+                digests.add(chunk)
+    
+    # Combine results in input order (round-robin tasks interleave)
+    with trace_span(tracer, "concatenate"):
+        pieces = [output for _, output in sorted(
+            ((start, output) for ranges, outputs in zip(tasks, results)
+             for (start, _), output in zip(ranges, outputs)),
+            key=lambda item: item[0])]
+        if not pieces:
+            return as_backend_data([], backend)
+        if backend == "numpy":
+            return np.concatenate(pieces)
+        return [item for sublist in pieces for item in sublist]
 
 
-def benchmark(data_size: int = 1000000, multiplier: float = 2.5) -> Tuple[float, float, float]:
+def tune_chunk_size(data, multiplier: float, num_workers: int, backend: str = "python",
+                    pool: Optional[WorkerPool] = None, kernel: Callable = process_chunk,
+                    chunks_per_worker: Sequence[int] = (1, 2, 4, 8, 16, 32),
+                    sample_fraction: float = 0.05,
+                    executor: str = "process") -> Dict[str, object]:
+    """
+    Pick a dynamic-schedule chunk size from a short calibration run.
+    
+    A strided sample (every 1/sample_fraction-th element, so cost that
+    varies along the array is represented) is processed once per
+    candidate number of chunks per worker; the fastest candidate is
+    scaled back to the full input size. The sample carries more per-chunk
+    overhead relative to its work than the full run, so the choice errs
+    toward larger chunks.
+    
+    Returns:
+        Dict with the chosen chunk_size and chunks_per_worker, the
+        per-candidate timings and the total calibration_time
+    """
+    n = len(data)
+    stride = max(1, round(1 / sample_fraction))
+    sample = as_backend_data(data[::stride], backend)
+    m = len(sample)
+    
+    start = time.perf_counter()
+    timings = {}
+    if m:
+        for chunks in chunks_per_worker:
+            size = max(1, -(-m // (num_workers * chunks)))
+            t0 = time.perf_counter()
+            parallel_processing(sample, multiplier, num_workers, backend, pool=pool,
+                                schedule=f"dynamic,{size}", kernel=kernel,
+                                executor=executor)
+            timings[chunks] = time.perf_counter() - t0
+    best = min(timings, key=timings.get) if timings else 1
+    return {
+        "chunk_size": max(1, -(-n // (num_workers * best))),
+        "chunks_per_worker": best,
+        "timings": timings,
+        "calibration_time": time.perf_counter() - start,
+    }
+
+
+class MemoryMonitor:
+    """
+    Track peak memory of this process and its children while in a block.
+    
+    A background thread samples every `interval` seconds. On Linux the
+    proportional set size (PSS) is read from /proc, so pages of a shared
+    segment mapped by several workers are only counted once; elsewhere
+    it falls back to the resource module's max RSS of this process.
+    
+    Usage:
+        with MemoryMonitor() as mon:
+            parallel_processing(data, 2.5)
+        print(mon.peak_bytes)
+    """
+    
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    @staticmethod
+    def _process_bytes(pid: int) -> int:
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            pass
+        return 0
+    
+    def sample(self) -> int:
+        """Return the current memory of this process plus its children."""
+        pids = [os.getpid()] + [child.pid for child in mp.active_children()]
+        total = sum(self._process_bytes(pid) for pid in pids)
+        if total == 0 and resource is not None:
+            # No /proc: report this process' high-water mark instead
+            scale = 1 if sys.platform == "darwin" else 1024
+            total = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return total
+    
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.sample())
+            self._stop.wait(self.interval)
+    
+    def __enter__(self) -> "MemoryMonitor":
+        self.peak_bytes = self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.sample())
+
+
+def benchmark(data_size: int = 1000000, multiplier: float = 2.5,
+              backend: str = "python", mode: str = "copy",
+              pool: Optional[WorkerPool] = None,
+              repeats: int = 3,
+              timings: Optional[Dict[str, float]] = None,
+              verify: str = "digest",
+              tolerance: Optional[float] = None) -> Tuple[float, float, float]:
     """
     Benchmark sequential vs parallel processing.
     
+    After one untimed warmup run (which also verifies the parallel result),
+    each version is timed `repeats` times with perf_counter and the median
+    is reported. See scaling_benchmark.py for confidence intervals.
+    
+    With a warm `pool` the parallel time is steady-state work only; its
+    startup cost is available separately as pool.startup_time.
+    
+    The input is built by input_generation.generate_data (on the pool's
+    workers when there is one); pass a dict as `timings` to receive the
+    generation time, which is not part of either measurement.
+    
+    Verification (`verify`):
+        "digest": the workers digest their chunks and the sequential
+            output is digested over the same chunks after the parallel
+            one is freed, so only one full output exists at a time
+            (`tolerance` compares sums within it instead of exact bytes)
+        "full": keep both outputs and compare them element by element
+    
     Returns:
         Tuple of (sequential_time, parallel_time, speedup)
     """
-    # Generate random data
-    random.seed(42)  # For reproducibility
-    data = [random.random() for _ in range(data_size)]
+    check_backend(backend)
+    if verify not in ("digest", "full"):
+        raise ValueError(f"Unknown verification {verify!r}, expected 'digest' or 'full'")
     
-    # Sequential processing
-    start = time.time()
-    seq_result = sequential_processing(data, multiplier)
-    seq_time = time.time() - start
+    # Generate random data (reproducible for any number of workers)
+    data = generate_data(data_size, seed=42, backend=backend, pool=pool, timings=timings)
     
     # Parallel processing (using all available cores)
-    num_workers = mp.cpu_count()
-    start = time.time()
-    par_result = parallel_processing(data, multiplier, num_workers)
-    par_time = time.time() - start
+    num_workers = pool.num_workers if pool is not None else mp.cpu_count()
+    seq_args = (data, multiplier, backend)
+    par_args = (data, multiplier, num_workers, backend, mode, pool)
     
-    # Verify results match
-    assert seq_result == par_result, "Results don't match!"
+    # Warmup run; verify results match
+    if verify == "digest":
+        digests = Digest(tolerance)
+        parallel_processing(*par_args, digests=digests)  # Output dropped at once
+        reference = digest_result(sequential_processing(*seq_args), digests.ranges(), tolerance)
+        mismatches = digests.compare(reference)
+        assert not mismatches, f"Results don't match in chunks starting at {mismatches}!"
+    else:
+        seq_result = sequential_processing(*seq_args)
+        par_result = parallel_processing(*par_args)
+        assert results_match(seq_result, par_result), "Results don't match!"
+        del seq_result, par_result
+    
+    seq_time = measure(sequential_processing, seq_args, warmup=0, repeats=repeats).median
+    par_time = measure(parallel_processing, par_args, warmup=0, repeats=repeats).median
     
     speedup = seq_time / par_time if par_time > 0 else 0
     
     return seq_time, par_time, speedup
 
 
-def demonstrate_data_parallelism():
-    """Demonstrate data parallelism concepts with examples."""
+def benchmark_backends(data_size: int = 1000000, multiplier: float = 2.5,
+                       pool: Optional[WorkerPool] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Run benchmark() once per available backend.
+    
+    Per-element throughput shows where interpreter overhead stops
+    dominating: the "python" backend pays for one bytecode loop iteration
+    and one boxed float per element, the "numpy" backend does not.
+    
+    Returns:
+        Mapping of backend name to its times, speedup and throughput
+        (elements per second) for the sequential and parallel runs
+    """
+    report = {}
+    for backend in BACKENDS:
+        if backend == "numpy" and np is None:
+            continue
+        seq_time, par_time, speedup = benchmark(data_size, multiplier, backend, pool=pool)
+        report[backend] = {
+            "seq_time": seq_time,
+            "par_time": par_time,
+            "speedup": speedup,
+            "seq_throughput": data_size / seq_time if seq_time > 0 else 0.0,
+            "par_throughput": data_size / par_time if par_time > 0 else 0.0,
+        }
+    return report
+
+
+def benchmark_modes(data_size: int = 1000000, multiplier: float = 2.5,
+                    backend: str = "python",
+                    pool: Optional[WorkerPool] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Compare the data planes of parallel_processing on time and peak memory.
+    
+    Each mode runs the same sequential baseline and parallel pass as
+    benchmark(), with a MemoryMonitor around each so peak memory (parent
+    plus workers) is reported next to the timings.
+    
+    Returns:
+        Mapping of mode to seq/par times, speedup and peak bytes
+    """
+    check_backend(backend)
+    data = generate_data(data_size, seed=42, backend=backend, pool=pool)
+    num_workers = pool.num_workers if pool is not None else mp.cpu_count()
+    
+    report = {}
+    for mode in MODES:
+        with MemoryMonitor() as seq_mem:
+            start = time.perf_counter()
+            seq_result = sequential_processing(data, multiplier, backend)
+            seq_time = time.perf_counter() - start
+        del seq_result
+        
+        with MemoryMonitor() as par_mem:
+            start = time.perf_counter()
+            par_result = parallel_processing(data, multiplier, num_workers, backend,
+                                             mode, pool)
+            par_time = time.perf_counter() - start
+        del par_result
+        
+        report[mode] = {
+            "seq_time": seq_time,
+            "par_time": par_time,
+            "speedup": seq_time / par_time if par_time > 0 else 0.0,
+            "seq_peak_bytes": seq_mem.peak_bytes,
+            "par_peak_bytes": par_mem.peak_bytes,
+        }
+    return report
+
+
+def benchmark_schedules(data_size: int = 1000000, multiplier: float = 2.5,
+                        kernel: Callable = process_chunk, backend: str = "python",
+                        pool: Optional[WorkerPool] = None,
+                        repeats: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Time parallel_processing under each schedule for one kernel.
+    
+    Inputs rise along the array (i / n), so irregular_chunk gets more
+    expensive toward the end while process_chunk stays uniform. "auto"
+    is tuned once up front; its calibration time is reported separately
+    and not included in its median.
+    
+    Returns:
+        Mapping of schedule label to median time, number of tasks and
+        (for auto) calibration time
+    """
+    check_backend(backend)
+    data = as_backend_data([i / data_size for i in range(data_size)], backend)
+    num_workers = pool.num_workers if pool is not None else mp.cpu_count()
+    expected = kernel(data, multiplier, backend)
+    chunk = max(1, -(-data_size // (DYNAMIC_CHUNKS_PER_WORKER * num_workers)))
+    
+    tuned = tune_chunk_size(data, multiplier, num_workers, backend, pool, kernel)
+    schedules = {
+        "static": "static",
+        f"static,{chunk}": f"static,{chunk}",
+        f"dynamic,{chunk}": f"dynamic,{chunk}",
+        "guided": "guided",
+        f"auto (dynamic,{tuned['chunk_size']})": f"dynamic,{tuned['chunk_size']}",
+    }
+    
+    report = {}
+    for label, schedule in schedules.items():
+        args = (data, multiplier, num_workers, backend, "copy", pool, None, schedule, kernel)
+        assert results_match(parallel_processing(*args), expected), "Results don't match!"
+        kind, chunk_size = parse_schedule(schedule)
+        report[label] = {
+            "time": measure(parallel_processing, args, warmup=0, repeats=repeats).median,
+            "tasks": len(schedule_ranges(data_size, num_workers, kind, chunk_size)),
+        }
+    report[f"auto (dynamic,{tuned['chunk_size']})"]["calibration_time"] = tuned["calibration_time"]
+    return report
+
+
+def benchmark_executors(data_size: int = 1000000, multiplier: float = 2.5,
+                        pool: Optional[WorkerPool] = None,
+                        repeats: int = 3) -> Dict[str, Dict[str, float]]:
+    """
+    Compare process and thread executors for each available backend.
+    
+    The NumPy kernel releases the GIL inside np.multiply, so threads can
+    run it in parallel without any pickling; the pure-Python kernel holds
+    the GIL, so threads take turns unless the interpreter is
+    free-threaded.
+    
+    Returns:
+        Mapping of backend to the sequential time and the median time of
+        each executor
+    """
+    num_workers = pool.num_workers if pool is not None else mp.cpu_count()
+    report = {}
+    for backend in BACKENDS:
+        if backend == "numpy" and np is None:
+            continue
+        data = generate_data(data_size, seed=42, backend=backend, pool=pool)
+        expected = sequential_processing(data, multiplier, backend)
+        times = {"sequential": measure(sequential_processing, (data, multiplier, backend),
+                                       warmup=0, repeats=repeats).median}
+        for executor in EXECUTORS:
+            args = (data, multiplier, num_workers, backend, "copy", pool, None, "static",
+                    process_chunk, executor)
+            assert results_match(parallel_processing(*args), expected), "Results don't match!"
+            times[executor] = measure(parallel_processing, args, warmup=0,
+                                      repeats=repeats).median
+        report[backend] = times
+    return report
+
+
+def compare_executors(pool: Optional[WorkerPool] = None):
+    """Compare worker processes with threads on both backends."""
+    print("\n" + "=" * 60)
+    print("PROCESSES VS THREADS")
+    print("=" * 60)
+    
+    state = "disabled" if not gil_enabled() else "enabled"
+    build = "free-threaded" if free_threaded_build() else "standard"
+    print(f"\nInterpreter: {build} build, GIL {state}")
+    print("\nBackend | Sequential (s) | Processes (s) | Threads (s)")
+    print("-" * 56)
+    for backend, times in benchmark_executors(pool=pool).items():
+        print(f"{backend:7s} | {times['sequential']:14.4f} | {times['process']:13.4f} | "
+              f"{times['thread']:11.4f}")
+    print("\nThreads skip pickling and process startup entirely, but with the GIL")
+    print("enabled only GIL-releasing kernels (like NumPy's) run in parallel.")
+
+
+def compare_schedules(pool: Optional[WorkerPool] = None):
+    """Compare loop schedules on a uniform and on an irregular kernel."""
+    print("\n" + "=" * 60)
+    print("LOOP SCHEDULING")
+    print("=" * 60)
+    
+    for title, kernel, size in [("Uniform kernel (process_chunk)", process_chunk, 1000000),
+                                ("Irregular kernel (irregular_chunk)", irregular_chunk, 50000)]:
+        print(f"\n{title}, {size:,} elements:")
+        print("   Schedule              | Tasks | Time (s)")
+        print("   " + "-" * 42)
+        report = benchmark_schedules(size, kernel=kernel, pool=pool)
+        for label, stats in report.items():
+            print(f"   {label:21s} | {stats['tasks']:5d} | {stats['time']:8.4f}")
+            if "calibration_time" in stats:
+                print(f"   (auto calibration took {stats['calibration_time']:.4f} s)")
+    
+    print("\nStatic splits suit uniform work: the fewest tasks means the least")
+    print("dispatch overhead. When cost varies per element, dynamic and guided")
+    print("schedules let idle workers take the remaining chunks instead of")
+    print("waiting for the slowest one.")
+
+
+def demonstrate_data_parallelism(pool: Optional[WorkerPool] = None):
+    """
+    Demonstrate data parallelism concepts with examples.
+    
+    A warm `pool` is reused for the backend and data plane comparisons;
+    without one, a pool is created here and closed at the end.
+    """
     print("=" * 60)
     print("DATA PARALLELISM DEMONSTRATION")
     print("=" * 60)
@@ -126,6 +916,37 @@ def demonstrate_data_parallelism():
     print(f"   Speedup: {speedup:.2f}x")
     print(f"   Efficiency: {(speedup / mp.cpu_count() * 100):.1f}%")
     
+    owns_pool = pool is None
+    if owns_pool:
+        pool = WorkerPool(mp.cpu_count())
+    startup = pool.start() or pool.startup_time
+    timings = {}
+    seq_time, par_time, speedup = benchmark(1000000, pool=pool, timings=timings)
+    print("\n   Same benchmark on a warm, persistent pool:")
+    print(f"   Pool startup (spawn + warmup): {startup:.3f} seconds")
+    print(f"   Worker affinity: {format_affinity(pool.affinity)}")
+    print(f"   Input generation on the pool: {timings['generation']:.3f} seconds")
+    print(f"   Steady-state parallel time: {par_time:.3f} seconds")
+    print(f"   Steady-state speedup: {speedup:.2f}x")
+    
+    print("\n   Per-element throughput by backend:")
+    print("   Backend | Seq (Melem/s) | Par (Melem/s) | Speedup")
+    print("   " + "-" * 48)
+    for backend, stats in benchmark_backends(1000000, pool=pool).items():
+        print(f"   {backend:7s} | {stats['seq_throughput'] / 1e6:13.1f} | "
+              f"{stats['par_throughput'] / 1e6:13.1f} | {stats['speedup']:6.2f}x")
+    if np is None:
+        print("   (install NumPy to compare the vectorized backend)")
+    
+    print("\n   Data plane comparison (time and peak memory):")
+    print("   Mode   | Par time (s) | Speedup | Par peak (MiB)")
+    print("   " + "-" * 48)
+    for mode, stats in benchmark_modes(1000000, pool=pool).items():
+        print(f"   {mode:6s} | {stats['par_time']:12.3f} | {stats['speedup']:6.2f}x | "
+              f"{stats['par_peak_bytes'] / 2**20:14.1f}")
+    if owns_pool:
+        pool.close()
+    
     print("\n5. Key Characteristics:")
     print("   - Same operation applied to all data")
     print("   - Minimal communication between workers")
@@ -142,70 +963,79 @@ def demonstrate_data_parallelism():
     print("   - Data partitioning strategy")
     print("   - Load balancing for irregular data")
     print("   - Result aggregation")
-    print("   - Memory usage with many copies")
+    print("   - Memory usage with many copies (see mode=\"shared\")")
 
 
-def compare_scaling():
-    """Demonstrate strong vs weak scaling."""
+def compare_scaling(pool: Optional[WorkerPool] = None, repeats: int = 5):
+    """
+    Demonstrate strong vs weak scaling.
+    
+    One persistent pool is resized for each worker count, so the timings
+    are steady-state work and pool startup is reported separately. Each
+    point is the median of `repeats` perf_counter samples, measured
+    against a real sequential baseline; efficiencies and the Amdahl /
+    Gustafson serial fractions come from scaling_benchmark.
+    """
     print("\n" + "=" * 60)
     print("SCALING ANALYSIS")
     print("=" * 60)
     
-    data_sizes = [100000, 500000, 1000000]
-    workers_list = [1, 2, 4]
+    workers_list = [w for w in [1, 2, 4] if w <= mp.cpu_count()]
+    multiplier = 2.5
     
-    print("\nStrong Scaling (fixed problem size = 1,000,000):")
-    print("Workers | Time (s) | Speedup | Efficiency")
-    print("-" * 40)
+    owns_pool = pool is None
+    if owns_pool:
+        pool = WorkerPool(1)
     
-    random.seed(42)  # For reproducibility
-    data = [random.random() for _ in range(1000000)]
-    multiplier = 2.5
+    inputs = {}
+    generation = {}
     
-    for workers in workers_list:
-        if workers <= mp.cpu_count():
-            # Time parallel processing
-            start = time.time()
-            parallel_processing(data, multiplier, workers)
-            par_time = time.time() - start
-            
-            # Time sequential (1 worker)
-            if workers == 1:
-                seq_time = par_time
-                speedup = 1.0
-            else:
-                speedup = seq_time / par_time
-            
-            efficiency = (speedup / workers) * 100
-            print(f"{workers:7d} | {par_time:8.3f} | {speedup:7.2f} | {efficiency:9.1f}%")
+    def make_data(n: int) -> List[float]:
+        # Generated once per size, outside the timed region, on the pool;
+        # the values do not depend on its current size
+        if n not in inputs:
+            timings = {}
+            inputs[n] = generate_data(n, seed=42 + n, pool=pool, timings=timings)
+            generation[n] = timings["generation"]
+        return inputs[n]
+    
+    def run_parallel(n: int, workers: int) -> List[float]:
+        pool.resize(workers)
+        return parallel_processing(make_data(n), multiplier, workers, pool=pool)
     
-    print("\nWeak Scaling (problem size per worker = 250,000):")
-    print("Workers | Total Size | Time (s) | Efficiency")
-    print("-" * 45)
+    def run_sequential(n: int) -> List[float]:
+        return sequential_processing(make_data(n), multiplier)
     
-    base_size = 250000
+    startup = {}
     for workers in workers_list:
-        if workers <= mp.cpu_count():
-            total_size = base_size * workers
-            random.seed(42 + workers)  # Different seed for each size
-            data = [random.random() for _ in range(total_size)]
-            
-            start = time.time()
-            parallel_processing(data, multiplier, workers)
-            par_time = time.time() - start
-            
-            # Ideal: constant time as problem scales with workers
-            ideal_time = par_time if workers == 1 else par_time
-            efficiency = 100  # Simplified for demonstration
-            
-            print(f"{workers:7d} | {total_size:10d} | {par_time:8.3f} | {efficiency:9.1f}%")
+        pool.resize(workers)
+        startup[workers] = pool.startup_time
+    
+    strong = strong_scaling(run_parallel, 1000000, workers_list, run_sequential,
+                            warmup=1, repeats=repeats)
+    weak = weak_scaling(run_parallel, 250000, workers_list, run_sequential,
+                        warmup=1, repeats=repeats)
+    print_report("data_parallel", strong, weak)
+    
+    print("\nPool startup (excluded from the times above):")
+    for workers, seconds in startup.items():
+        print(f"   {workers} workers: {seconds:.3f} seconds")
+    print("Input generation (excluded from the times above):")
+    for n, seconds in sorted(generation.items()):
+        print(f"   {n:,} elements: {seconds:.3f} seconds")
+    if owns_pool:
+        pool.close()
 
 
 if __name__ == "__main__":
     print(f"System has {mp.cpu_count()} CPU cores")
     
-    demonstrate_data_parallelism()
-    compare_scaling()
+    # One warm pool shared by every measurement below
+    with WorkerPool(mp.cpu_count()) as pool:
+        demonstrate_data_parallelism(pool)
+        compare_schedules(pool)
+        compare_executors(pool)
+        compare_scaling(pool)
     
     print("\n" + "=" * 60)
     print("SUMMARY")
@@ -220,7 +1050,7 @@ if __name__ == "__main__":
     print("3. Combine results")
     
     print("\nTry modifying this code to:")
-    print("1. Change the operation (e.g., square root, sine)")
+    print("1. Change the operation (e.g., square root, sine; see kernel_chain.py)")
     print("2. Use different data types (e.g., strings, images)")
-    print("3. Implement with threads instead of processes")
+    print("3. Compare executor=\"thread\" on a free-threaded Python build")
     print("4. Add error handling for uneven partitions")
\ No newline at end of file
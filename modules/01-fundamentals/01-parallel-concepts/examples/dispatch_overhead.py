@@ -0,0 +1,467 @@
+#!/usr/bin/env python3
+"""
+Dispatch Overhead Microbenchmarks
+
+The cost of handing an empty task to another process is the floor on
+useful task granularity: a task that runs for less than that costs more
+to dispatch than to compute. This module measures the floor:
+
+1. Round-trip latency (one task in flight) and throughput (a window of
+   tasks in flight) of an echo worker behind four channels:
+   - "queue": a pair of mp.Queue (pickling plus a feeder thread), as
+     task_parallel_demo's workers use
+   - "pool": mp.Pool, apply_async for latency and map for throughput
+   - "pipe": one duplex mp.Pipe (pickling, no feeder thread)
+   - "ring": a pair of single-producer single-consumer rings of int64
+     slots in shared memory, polled with sched_yield (no pickling, no
+     system call per message while both sides are busy). x86 only, see
+     ShmRing
+2. Each channel under the fork, spawn and forkserver start methods
+3. Process startup time as the argument payload and the modules the
+   child imports grow (fork inherits both; spawn pickles the payload and
+   starts a fresh interpreter)
+
+recommend_granularity turns the measured per-task overhead of
+parallel_task_processing and per-chunk overhead of parallel_processing
+into the smallest task duration and chunk size that keep the overhead
+under a target share of the run time.
+"""
+
+import abc
+import importlib
+import importlib.util
+import math
+import os
+import platform
+import time
+import multiprocessing as mp
+from collections import deque
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+
+START_METHODS = tuple(m for m in ("fork", "spawn", "forkserver")
+                      if m in mp.get_all_start_methods())
+
+# ShmRing needs x86's store ordering (total store order); see there
+RING_SUPPORTED = platform.machine().lower() in ("x86_64", "amd64", "i386", "i686", "x86")
+
+CHANNELS = ("queue", "pool", "pipe") + (("ring",) if RING_SUPPORTED else ())
+
+# Poll loop backoff for the ring; Windows has no sched_yield
+_yield = getattr(os, "sched_yield", lambda: time.sleep(0))
+
+
+def echo(x: int) -> int:
+    """The task: no work, so all of its cost is dispatch."""
+    return x + 1
+
+
+class ShmRing:
+    """
+    Bounded ring of int64 slots in a shared memory segment, for exactly
+    one producer process and one consumer process.
+
+    Layout: [head, tail, slot 0, slot 1, ...]. Only the consumer writes
+    head and only the producer writes tail, so no lock is needed; both
+    poll (yielding the CPU) while the ring is empty or full.
+
+    There are no memory fences: put() stores the slot and then tail, and
+    the consumer must never see the new tail before the slot (likewise
+    for head and slot reuse). x86 guarantees this (total store order:
+    stores become visible in program order, and loads are not reordered
+    with older loads); arm64 and other weakly ordered CPUs do not, so the
+    ring refuses to run there (RING_SUPPORTED). It also assumes aligned
+    8-byte stores are not torn.
+    """
+
+    def __init__(self, slots: int = 1024, name: Optional[str] = None):
+        if not RING_SUPPORTED:
+            raise RuntimeError(f"ShmRing relies on x86 store ordering, not available on "
+                               f"{platform.machine()!r}")
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None,
+                                              size=(slots + 2) * 8)
+        self.cells = self.shm.buf.cast("q")
+        if name is None:
+            self.cells[0] = self.cells[1] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def put(self, value: int) -> None:
+        tail = self.cells[1]
+        while tail - self.cells[0] >= self.slots:  # Full
+            _yield()
+        self.cells[2 + tail % self.slots] = value
+        self.cells[1] = tail + 1
+
+    def get(self) -> int:
+        head = self.cells[0]
+        while self.cells[1] == head:  # Empty
+            _yield()
+        value = self.cells[2 + head % self.slots]
+        self.cells[0] = head + 1
+        return value
+
+    def close(self, unlink: bool = False) -> None:
+        self.cells.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+# Echo workers; -1 (or None) tells them to stop
+
+def queue_echo(inbox, outbox) -> None:
+    for x in iter(inbox.get, None):
+        outbox.put(echo(x))
+
+
+def pipe_echo(conn) -> None:
+    for x in iter(conn.recv, None):
+        conn.send(echo(x))
+
+
+def ring_echo(requests: str, responses: str, slots: int) -> None:
+    inbox, outbox = ShmRing(slots, requests), ShmRing(slots, responses)
+    try:
+        for x in iter(inbox.get, -1):
+            outbox.put(echo(x))
+    finally:
+        inbox.close()
+        outbox.close()
+
+
+class Channel(abc.ABC):
+    """Parent end of one echo worker: send and receive one task at a time."""
+
+    @abc.abstractmethod
+    def send(self, x: int) -> None:
+        """Hand task x to the worker."""
+
+    @abc.abstractmethod
+    def recv(self) -> int:
+        """The next result, waiting for it if needed."""
+
+    @abc.abstractmethod
+    def close(self) -> None:
+        """Stop the worker and free the channel."""
+
+    def stream(self, n: int, window: int = 64) -> float:
+        """
+        Push n tasks through, keeping up to `window` in flight.
+
+        Returns:
+            Seconds; window=1 gives n round trips, one at a time
+        """
+        start = time.perf_counter()
+        sent = received = 0
+        while received < n:
+            while sent < n and sent - received < window:
+                self.send(sent)
+                sent += 1
+            self.recv()
+            received += 1
+        return time.perf_counter() - start
+
+
+class QueueChannel(Channel):
+    def __init__(self, ctx):
+        self.inbox, self.outbox = ctx.Queue(), ctx.Queue()
+        self.process = ctx.Process(target=queue_echo, args=(self.inbox, self.outbox))
+        self.process.start()
+
+    def send(self, x: int) -> None:
+        self.inbox.put(x)
+
+    def recv(self) -> int:
+        return self.outbox.get()
+
+    def close(self) -> None:
+        self.inbox.put(None)
+        self.process.join()
+
+
+class PipeChannel(Channel):
+    def __init__(self, ctx):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=pipe_echo, args=(child,))
+        self.process.start()
+        child.close()
+
+    def send(self, x: int) -> None:
+        self.conn.send(x)
+
+    def recv(self) -> int:
+        return self.conn.recv()
+
+    def close(self) -> None:
+        self.conn.send(None)
+        self.process.join()
+        self.conn.close()
+
+
+class RingChannel(Channel):
+    def __init__(self, ctx, slots: int = 1024):
+        # The child attaches to the rings; sharing the parent's tracker
+        # keeps it from reporting them as leaked
+        resource_tracker.ensure_running()
+        self.requests, self.responses = ShmRing(slots), ShmRing(slots)
+        self.process = ctx.Process(target=ring_echo,
+                                   args=(self.requests.name, self.responses.name, slots))
+        self.process.start()
+
+    def send(self, x: int) -> None:
+        self.requests.put(x)
+
+    def recv(self) -> int:
+        return self.responses.get()
+
+    def close(self) -> None:
+        self.requests.put(-1)
+        self.process.join()
+        self.requests.close(unlink=True)
+        self.responses.close(unlink=True)
+
+
+class PoolChannel(Channel):
+    def __init__(self, ctx):
+        self.pool = ctx.Pool(1)
+        self.pending = deque()
+
+    def send(self, x: int) -> None:
+        self.pending.append(self.pool.apply_async(echo, (x,)))
+
+    def recv(self) -> int:
+        return self.pending.popleft().get()
+
+    def stream(self, n: int, window: int = 64) -> float:
+        if window == 1:
+            return super().stream(n, window)
+        start = time.perf_counter()
+        self.pool.map(echo, range(n), chunksize=1)
+        return time.perf_counter() - start
+
+    def close(self) -> None:
+        self.pool.close()
+        self.pool.join()
+
+
+CHANNEL_TYPES = {"queue": QueueChannel, "pool": PoolChannel,
+                 "pipe": PipeChannel, "ring": RingChannel}
+
+
+def open_channel(kind: str, start_method: str = "fork") -> Tuple[Channel, float]:
+    """
+    Start an echo worker behind a channel.
+
+    Returns:
+        (channel, seconds until the first round trip completed, i.e. the
+        worker's startup time)
+    """
+    if kind not in CHANNEL_TYPES:
+        raise ValueError(f"Unknown channel {kind!r}, expected one of {CHANNELS}")
+    start = time.perf_counter()
+    channel = CHANNEL_TYPES[kind](mp.get_context(start_method))
+    channel.send(0)
+    channel.recv()
+    return channel, time.perf_counter() - start
+
+
+def benchmark_channel(kind: str, start_method: str = "fork", round_trips: int = 2000,
+                      tasks: int = 20000, window: int = 64) -> Dict[str, float]:
+    """
+    Startup, round-trip latency and throughput of one channel.
+
+    Returns:
+        {"startup": seconds, "latency": seconds per round trip,
+         "throughput": tasks per second with `window` in flight}
+    """
+    channel, startup = open_channel(kind, start_method)
+    try:
+        channel.stream(min(100, round_trips), window=1)  # Warmup
+        latency = channel.stream(round_trips, window=1) / round_trips
+        throughput = tasks / channel.stream(tasks, window)
+    finally:
+        channel.close()
+    return {"startup": startup, "latency": latency, "throughput": throughput}
+
+
+def benchmark_dispatch(start_methods: Sequence[str] = START_METHODS,
+                       channels: Sequence[str] = CHANNELS,
+                       round_trips: int = 2000,
+                       tasks: int = 20000) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Mapping of start method to channel to benchmark_channel's results."""
+    return {method: {kind: benchmark_channel(kind, method, round_trips, tasks)
+                     for kind in channels}
+            for method in start_methods}
+
+
+def startup_probe(conn, payload: bytes, modules: Sequence[str]) -> None:
+    """Child side of benchmark_startup: import, then report in."""
+    for module in modules:
+        importlib.import_module(module)
+    conn.send(len(payload))
+
+
+def default_import_sets() -> Dict[str, Tuple[str, ...]]:
+    """Module sets for benchmark_startup; "numpy" only where it is installed."""
+    sets = {"none": (), "stdlib": ("json", "decimal", "asyncio", "statistics")}
+    if importlib.util.find_spec("numpy") is not None:
+        sets["numpy"] = ("numpy",)
+    return sets
+
+
+def benchmark_startup(start_methods: Sequence[str] = START_METHODS,
+                      payload_sizes: Sequence[int] = (0, 2**20, 16 * 2**20),
+                      import_sets: Optional[Dict[str, Tuple[str, ...]]] = None,
+                      repeats: int = 3) -> Dict[str, Dict[Tuple[int, str], float]]:
+    """
+    Seconds from Process.start() until the child has imported its
+    modules and answered, for every payload size and import set.
+
+    Modules the parent has already imported cost nothing under fork.
+
+    Returns:
+        Mapping of start method to (payload bytes, import set) to the
+        median time
+    """
+    import_sets = import_sets if import_sets is not None else default_import_sets()
+    report = {}
+    for method in start_methods:
+        ctx = mp.get_context(method)
+        report[method] = {}
+        for size in payload_sizes:
+            payload = bytes(size)
+            for label, modules in import_sets.items():
+                times = []
+                for _ in range(repeats):
+                    conn, child = ctx.Pipe()
+                    start = time.perf_counter()
+                    process = ctx.Process(target=startup_probe, args=(child, payload, modules))
+                    process.start()
+                    conn.recv()
+                    times.append(time.perf_counter() - start)
+                    process.join()
+                    conn.close()
+                    child.close()
+                report[method][(size, label)] = sorted(times)[len(times) // 2]
+    return report
+
+
+def min_work(overhead: float, target_efficiency: float) -> float:
+    """
+    Smallest work per task for work / (work + overhead) >= target_efficiency.
+    """
+    if not 0 < target_efficiency < 1:
+        raise ValueError("target_efficiency must be between 0 and 1")
+    return overhead * target_efficiency / (1 - target_efficiency)
+
+
+def recommend_granularity(target_efficiency: float = 0.9, num_workers: Optional[int] = None,
+                          num_tasks: int = 5000, batch_sizes: Sequence[int] = (1, 64),
+                          element_count: int = 1000000) -> Dict[str, Any]:
+    """
+    Smallest useful task and chunk sizes for the demos on this machine.
+
+    parallel_task_processing: trivial (INCREMENT) tasks on a warm pool.
+    The worker time spent per task is num_workers * wall / num_tasks;
+    a task should run at least min_work(that) seconds.
+
+    parallel_processing: a call on num_workers elements (one per chunk)
+    on a warm pool measures the fixed cost per chunk, and process_chunk
+    on element_count elements the compute time per element. A chunk
+    should hold at least min_work(cost per chunk) / (time per element)
+    elements.
+
+    Returns:
+        {"tasks": {batch size: {"overhead", "min_seconds"}},
+         "chunks": {backend: {"overhead", "element_time", "min_elements"}}}
+    """
+    from data_parallel_demo import np, parallel_processing, process_chunk
+    from scaling_benchmark import measure
+    from task_parallel_demo import MicroTaskType, parallel_task_processing
+    from worker_pool import WorkerPool
+
+    num_workers = num_workers or mp.cpu_count()
+    tasks = [{"type": MicroTaskType.INCREMENT, "data": i} for i in range(num_tasks)]
+    report = {"target_efficiency": target_efficiency, "workers": num_workers,
+              "tasks": {}, "chunks": {}}
+    with WorkerPool(num_workers) as pool:
+        for batch_size in batch_sizes:
+            wall = measure(parallel_task_processing,
+                           (tasks, num_workers, pool, batch_size), repeats=3).median
+            overhead = num_workers * wall / num_tasks
+            report["tasks"][batch_size] = {"overhead": overhead,
+                                           "min_seconds": min_work(overhead, target_efficiency)}
+
+        for backend in ("python", "numpy") if np is not None else ("python",):
+            tiny = [1.0] * num_workers
+            big = [1.0] * element_count
+            if backend == "numpy":
+                tiny, big = np.asarray(tiny), np.asarray(big)
+            # One chunk per worker, so the call's wall time is the worker time per chunk
+            overhead = measure(parallel_processing,
+                               (tiny, 2.5, num_workers, backend, "copy", pool),
+                               repeats=5).median
+            compute = measure(process_chunk, (big, 2.5, backend), repeats=3).median
+            element_time = compute / element_count
+            report["chunks"][backend] = {
+                "overhead": overhead,
+                "element_time": element_time,
+                "min_elements": math.ceil(min_work(overhead, target_efficiency) / element_time),
+            }
+    return report
+
+
+def _format_size(nbytes: int) -> str:
+    for unit, scale in (("MiB", 2**20), ("KiB", 2**10)):
+        if nbytes >= scale:
+            return f"{nbytes // scale} {unit}"
+    return f"{nbytes} B"
+
+
+def demonstrate_dispatch_overhead():
+    """Run the three measurements and print the recommendations."""
+    print("=" * 60)
+    print("DISPATCH OVERHEAD")
+    print("=" * 60)
+
+    print("\n1. Echo worker per channel and start method:")
+    print("   Method     | Channel | Startup (ms) | Round trip (us) | Tasks/s")
+    print("   " + "-" * 66)
+    for method, channels in benchmark_dispatch().items():
+        for kind, stats in channels.items():
+            print(f"   {method:10s} | {kind:7s} | {1000 * stats['startup']:12.1f} | "
+                  f"{1e6 * stats['latency']:15.1f} | {stats['throughput']:9,.0f}")
+
+    print("\n2. Process startup by argument payload and child imports (ms):")
+    import_sets = default_import_sets()
+    print("   Method     | Payload  | " + " | ".join(f"{label:>7s}" for label in import_sets))
+    print("   " + "-" * (24 + 10 * len(import_sets)))
+    for method, times in benchmark_startup(import_sets=import_sets).items():
+        for size in sorted({size for size, _ in times}):
+            cells = [f"{1000 * times[(size, label)]:7.1f}" for label in import_sets]
+            print(f"   {method:10s} | {_format_size(size):8s} | " + " | ".join(cells))
+
+    report = recommend_granularity()
+    efficiency = report["target_efficiency"]
+    print(f"\n3. Minimum granularity for {100 * efficiency:.0f}% efficiency "
+          f"({report['workers']} workers, {mp.get_start_method()}, warm pool):")
+    for batch_size, stats in report["tasks"].items():
+        print(f"   parallel_task_processing, batch_size={batch_size}: overhead "
+              f"{1e6 * stats['overhead']:.1f} us/task -> tasks of at least "
+              f"{1000 * stats['min_seconds']:.3f} ms")
+    for backend, stats in report["chunks"].items():
+        print(f"   parallel_processing ({backend}): overhead {1000 * stats['overhead']:.2f} "
+              f"ms/chunk, {1e9 * stats['element_time']:.1f} ns/element -> chunks of at "
+              f"least {stats['min_elements']:,} elements")
+    print("\n   Below these sizes, batch tasks (batch_size) or use bigger chunks;")
+    print("   fewer workers can also be faster than more.")
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+    demonstrate_dispatch_overhead()
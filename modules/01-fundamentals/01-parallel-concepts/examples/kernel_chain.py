@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Fused Operation Chains
+
+Applying several elementwise operations (scale → sqrt → sin → clip) by
+calling parallel_processing once per operation re-partitions the data,
+pickles every chunk to a worker and back, and materializes a full
+intermediate result in the parent at every step.
+
+A Chain is a process_chunk-style kernel that applies all of its steps in
+one pass per chunk, so parallel_processing(data, 1.0, kernel=chain)
+ships the data once:
+
+- python backend: the chain is compiled into a single list
+  comprehension (sqrt(x * 2.5) inlined as one expression), so each
+  element goes through every step in one loop iteration
+- numpy backend: each step is a ufunc writing in place into one output
+  array, FUSE_BLOCK elements at a time, so a block stays in cache
+  across all the steps instead of every step streaming the whole array
+  through memory
+
+Chains are immutable and picklable: they carry only their steps.
+"""
+
+import math
+import time
+import multiprocessing as mp
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from data_parallel_demo import (MemoryMonitor, as_backend_data, check_backend, np,
+                                parallel_processing, parse_schedule, schedule_ranges)
+from input_generation import generate_data
+from worker_pool import WorkerPool
+
+
+# Elements per block on the numpy backend (64 KiB of float64, cache-resident)
+FUSE_BLOCK = 8192
+
+
+def _numpy_clip(src, dst, lo: float, hi: float) -> None:
+    np.clip(src, lo, hi, out=dst)
+
+
+# name -> (number of constants, Python expression template over {x} and
+# the constants {0}, {1}, ..., NumPy step writing f(src) into dst)
+OPS: Dict[str, Tuple[int, str, Callable]] = {
+    "scale": (1, "({x} * {0})", lambda src, dst, k: np.multiply(src, k, out=dst)),
+    "offset": (1, "({x} + {0})", lambda src, dst, b: np.add(src, b, out=dst)),
+    "square": (0, "_square({x})", lambda src, dst: np.square(src, out=dst)),
+    "sqrt": (0, "_sqrt({x})", lambda src, dst: np.sqrt(src, out=dst)),
+    "sin": (0, "_sin({x})", lambda src, dst: np.sin(src, out=dst)),
+    "cos": (0, "_cos({x})", lambda src, dst: np.cos(src, out=dst)),
+    "exp": (0, "_exp({x})", lambda src, dst: np.exp(src, out=dst)),
+    "abs": (0, "abs({x})", lambda src, dst: np.absolute(src, out=dst)),
+    "clip": (2, "min(max({x}, {0}), {1})", _numpy_clip),
+}
+
+
+# Scalar versions of the ufuncs for the python backend. The math module
+# raises where NumPy returns nan or inf, so they follow NumPy instead:
+# both backends give the same result for the same chain.
+
+def _square(v: float) -> float:
+    return v * v  # ** 2 raises OverflowError
+
+
+def _sqrt(v: float) -> float:
+    return math.sqrt(v) if v >= 0 else math.nan
+
+
+def _sin(v: float) -> float:
+    return math.sin(v) if math.isfinite(v) else math.nan
+
+
+def _cos(v: float) -> float:
+    return math.cos(v) if math.isfinite(v) else math.nan
+
+
+def _exp(v: float) -> float:
+    try:
+        return math.exp(v)
+    except OverflowError:
+        return math.inf
+
+
+_PY_GLOBALS = {"_square": _square, "_sqrt": _sqrt, "_sin": _sin, "_cos": _cos, "_exp": _exp}
+
+
+def _literal(value: float) -> str:
+    """Python source for a float constant; repr gives bare inf / nan otherwise."""
+    return repr(value) if math.isfinite(value) else f"float({str(value)!r})"
+
+
+class Chain:
+    """
+    A sequence of elementwise operations, applied as one fused kernel.
+
+    Usage:
+        chain = Chain().scale(2.5).sqrt().sin().clip(-0.5, 0.5)
+        result = parallel_processing(data, 1.0, 4, kernel=chain)
+
+    Called as kernel(chunk, multiplier, backend) like process_chunk;
+    `multiplier` is ignored (use a scale step). Both backends follow
+    NumPy on out-of-domain input: nan for sqrt(-1), inf on overflow.
+    """
+
+    def __init__(self, steps: Sequence[Tuple[str, Tuple[float, ...]]] = ()):
+        for name, args in steps:
+            if name not in OPS:
+                raise ValueError(f"Unknown operation {name!r}, expected one of {tuple(OPS)}")
+            if len(args) != OPS[name][0]:
+                raise ValueError(f"{name} takes {OPS[name][0]} argument(s), got {len(args)}")
+            if name == "clip" and args[0] > args[1]:
+                raise ValueError("clip needs lo <= hi")
+        self.steps = tuple((name, tuple(float(a) for a in args)) for name, args in steps)
+        self._compiled = None
+
+    def then(self, name: str, *args: float) -> "Chain":
+        """A new chain with one more step."""
+        return Chain(self.steps + ((name, args),))
+
+    def scale(self, k: float) -> "Chain":
+        return self.then("scale", k)
+
+    def offset(self, b: float) -> "Chain":
+        return self.then("offset", b)
+
+    def square(self) -> "Chain":
+        return self.then("square")
+
+    def sqrt(self) -> "Chain":
+        return self.then("sqrt")
+
+    def sin(self) -> "Chain":
+        return self.then("sin")
+
+    def cos(self) -> "Chain":
+        return self.then("cos")
+
+    def exp(self) -> "Chain":
+        return self.then("exp")
+
+    def abs(self) -> "Chain":
+        return self.then("abs")
+
+    def clip(self, lo: float, hi: float) -> "Chain":
+        return self.then("clip", lo, hi)
+
+    def split(self) -> List["Chain"]:
+        """One single-step chain per step (the unfused equivalent)."""
+        return [Chain([step]) for step in self.steps]
+
+    def expression(self) -> str:
+        """The fused Python expression for one element x."""
+        expr = "x"
+        for name, args in self.steps:
+            expr = OPS[name][1].format(*map(_literal, args), x=expr)
+        return expr
+
+    def _python_kernel(self) -> Callable:
+        # Compiled once per process; workers recompile after unpickling
+        if self._compiled is None:
+            self._compiled = eval(f"lambda chunk: [{self.expression()} for x in chunk]",
+                                  dict(_PY_GLOBALS))
+        return self._compiled
+
+    def __call__(self, chunk, multiplier: float = 1.0, backend: str = "python"):
+        if backend != "numpy":
+            return self._python_kernel()(chunk)
+        src = as_backend_data(chunk, backend)
+        out = np.empty(len(src), dtype=np.float64)
+        if not self.steps:
+            out[:] = src
+            return out
+        for start in range(0, len(src), FUSE_BLOCK):
+            block = out[start:start + FUSE_BLOCK]
+            # The first step reads the input, the rest update the block in place
+            step_src = src[start:start + FUSE_BLOCK]
+            for name, args in self.steps:
+                OPS[name][2](step_src, block, *args)
+                step_src = block
+        return out
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"steps": self.steps}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.steps = state["steps"]
+        self._compiled = None
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Chain) and self.steps == other.steps
+
+    def __repr__(self) -> str:
+        parts = [f"{name}({', '.join(f'{a:g}' for a in args)})" if args else name
+                 for name, args in self.steps]
+        return " → ".join(parts) or "identity"
+
+
+def run_fused(data, chain: Chain, num_workers: int = 4, backend: str = "python",
+              pool: Optional[WorkerPool] = None, mode: str = "copy"):
+    """Apply the whole chain in one parallel_processing pass."""
+    return parallel_processing(data, 1.0, num_workers, backend, mode, pool, kernel=chain)
+
+
+def run_steps(data, chain: Chain, num_workers: int = 4, backend: str = "python",
+              pool: Optional[WorkerPool] = None, mode: str = "copy"):
+    """Apply the chain one step per parallel_processing call (the unfused way)."""
+    for step in chain.split():
+        data = parallel_processing(data, 1.0, num_workers, backend, mode, pool, kernel=step)
+    return data
+
+
+def pickled_traffic(data, output, kernel: Callable, num_workers: int,
+                    backend: str = "python", schedule: str = "static") -> int:
+    """
+    Bytes one copy-mode parallel_processing call pickles between the
+    parent and the workers, given its input and output: each task's
+    (chunks, multiplier, backend, kernel) arguments on the way out and
+    its list of output chunks on the way back, serialized as
+    multiprocessing does (the pool's small per-message envelope aside).
+    """
+    data = as_backend_data(data, backend)
+    kind, chunk_size = parse_schedule(schedule)
+    total = 0
+    for ranges in schedule_ranges(len(data), num_workers, kind, chunk_size):
+        args = ([data[start:end] for start, end in ranges], 1.0, backend, kernel)
+        outputs = [output[start:end] for start, end in ranges]
+        total += len(ForkingPickler.dumps(args)) + len(ForkingPickler.dumps(outputs))
+    return total
+
+
+def _results_match(a, b, backend: str) -> bool:
+    if backend == "numpy":
+        return bool(np.allclose(a, b, rtol=1e-12, atol=0.0))
+    return len(a) == len(b) and all(math.isclose(x, y, rel_tol=1e-12) for x, y in zip(a, b))
+
+
+def benchmark_chain(chain: Optional[Chain] = None, data_size: int = 1000000,
+                    backend: str = "python", pool: Optional[WorkerPool] = None,
+                    mode: str = "copy") -> Dict[str, Dict[str, Any]]:
+    """
+    Step-by-step vs fused, on wall time, peak memory and IPC volume.
+
+    IPC volume is measured with pickled_traffic after the timed runs:
+    the bytes each parallel_processing call pickled to the workers and
+    back. In shared mode the data moves through shared memory instead
+    and only segment names are pickled, so it is None.
+
+    Returns:
+        {"step-by-step": {...}, "fused": {...}}, each with "time",
+        "peak_bytes", "passes" and "ipc_bytes"
+    """
+    check_backend(backend)
+    chain = chain or Chain().scale(2.5).sqrt().sin().clip(-0.5, 0.5)
+    num_workers = pool.num_workers if pool is not None else mp.cpu_count()
+    data = generate_data(data_size, backend=backend, pool=pool)
+
+    report, results = {}, {}
+    for label, run, passes in (("step-by-step", run_steps, len(chain.steps)),
+                               ("fused", run_fused, 1)):
+        with MemoryMonitor() as memory:
+            start = time.perf_counter()
+            results[label] = run(data, chain, num_workers, backend, pool, mode)
+            elapsed = time.perf_counter() - start
+        report[label] = {"time": elapsed, "peak_bytes": memory.peak_bytes,
+                         "passes": passes, "ipc_bytes": None}
+    assert _results_match(results["step-by-step"], results["fused"], backend), \
+        "Results don't match!"
+
+    if mode == "copy":
+        # Replay the steps here to get each call's input and output
+        traffic, current = 0, data
+        for step in chain.split():
+            output = step(current, 1.0, backend)
+            traffic += pickled_traffic(current, output, step, num_workers, backend)
+            current = output
+        report["step-by-step"]["ipc_bytes"] = traffic
+        report["fused"]["ipc_bytes"] = pickled_traffic(data, results["fused"], chain,
+                                                       num_workers, backend)
+    return report
+
+
+def demonstrate_kernel_chain():
+    """Compare the fused chain with one parallel_processing call per step."""
+    print("=" * 60)
+    print("FUSED OPERATION CHAINS")
+    print("=" * 60)
+
+    chain = Chain().scale(2.5).sqrt().sin().clip(-0.5, 0.5)
+    print(f"\nChain: {chain}")
+    print(f"Fused Python expression: {chain.expression()}")
+
+    backends = ["python"] + (["numpy"] if np is not None else [])
+    with WorkerPool() as pool:
+        for backend in backends:
+            print(f"\n{backend} backend, 1,000,000 elements, {pool.num_workers} workers:")
+            print("   Approach     | Passes | Time (s) | Peak memory | IPC volume")
+            print("   " + "-" * 62)
+            for label, stats in benchmark_chain(chain, backend=backend, pool=pool).items():
+                ipc = stats["ipc_bytes"]
+                print(f"   {label:12s} | {stats['passes']:6d} | {stats['time']:8.3f} | "
+                      f"{stats['peak_bytes'] / 2**20:7.1f} MiB | "
+                      + (f"{ipc / 2**20:6.1f} MiB" if ipc is not None else "     -"))
+
+    print("\nEvery extra step of the unfused chain costs another round trip of")
+    print("the whole array through the workers; fused, each element makes the")
+    print("round trip once and passes through all steps while in cache.")
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+    demonstrate_kernel_chain()
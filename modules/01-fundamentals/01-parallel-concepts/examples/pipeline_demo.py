@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Pipeline Parallelism Demonstration
+
+This example runs the decode → filter → encode pipeline described in
+task_parallel_demo.compare_with_data_parallelism:
+
+- Each stage has its own group of worker processes, sized independently
+- Stages are connected by bounded queues: a stage that falls behind
+  fills its input queue, which blocks the stage before it (backpressure)
+  instead of letting work pile up in memory
+- A stage can apply a process_chunk-style kernel to each item, so items
+  (chunks) are processed data-parallel across that stage's workers
+
+The report gives each stage's throughput, utilization and the time its
+workers spent starved (empty input) or blocked (full output), plus the
+occupancy of every queue. The bottleneck is the stage with the lowest
+capacity: its input queue stays full and the stages after it starve.
+"""
+
+import math
+import threading
+import time
+import zlib
+import multiprocessing as mp
+from array import array
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from data_parallel_demo import process_chunk
+from input_generation import generate_range
+
+
+@dataclass
+class Stage:
+    """
+    One step of a pipeline.
+
+    Attributes:
+        name: Stage name for reports
+        func: Turns one item into the next stage's item. Must be a
+            module-level function (or a partial of one) so workers can
+            unpickle it.
+        workers: Worker processes for this stage
+        queue_size: Capacity of the stage's input queue
+    """
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+    queue_size: int = 4
+
+
+class StageError(NamedTuple):
+    """Takes the place of an item whose stage function raised; later stages pass it on."""
+    stage: str
+    error: str
+
+
+def apply_kernel(kernel: Callable, multiplier: float, backend: str, chunk: Any) -> Any:
+    """Stage function wrapping a process_chunk-style kernel."""
+    return kernel(chunk, multiplier, backend)
+
+
+def kernel_stage(name: str, kernel: Callable = process_chunk, multiplier: float = 2.0,
+                 backend: str = "python", workers: int = 1, queue_size: int = 4) -> Stage:
+    """A stage that applies kernel(chunk, multiplier, backend) to every item."""
+    return Stage(name, partial(apply_kernel, kernel, multiplier, backend), workers, queue_size)
+
+
+def stage_worker(stage: int, name: str, func: Callable[[Any], Any], inbox: mp.Queue,
+                 outbox: mp.Queue, stats_queue: mp.Queue):
+    """
+    Apply func to (seq, item) messages until a None arrives.
+
+    Time is split three ways: busy in func, starved (waiting for input)
+    and blocked (waiting for room in the next queue). Totals go to
+    stats_queue when the worker stops. A failing item becomes a
+    StageError, so the pipeline keeps flowing and the parent reports it.
+    """
+    items = 0
+    busy = starved = blocked = 0.0
+    while True:
+        t0 = time.perf_counter()
+        message = inbox.get()
+        t1 = time.perf_counter()
+        starved += t1 - t0
+        if message is None:
+            break
+        seq, item = message
+        if not isinstance(item, StageError):
+            try:
+                item = func(item)
+            except Exception as exc:
+                item = StageError(name, repr(exc))
+        t2 = time.perf_counter()
+        outbox.put((seq, item))  # Blocks while the next stage is behind
+        blocked += time.perf_counter() - t2
+        busy += t2 - t1
+        items += 1
+    stats_queue.put((stage, items, busy, starved, blocked))
+
+
+def _queue_size(q: mp.Queue) -> Optional[int]:
+    try:
+        return q.qsize()
+    except NotImplementedError:  # macOS has no sem_getvalue
+        return None
+
+
+def run_pipeline(source: Iterable, stages: List[Stage],
+                 sample_interval: float = 0.005) -> Tuple[List[Any], Dict[str, Any]]:
+    """
+    Stream items from source through the stages.
+
+    Items are tagged with their position, so results come back in input
+    order even when a stage with several workers finishes them out of
+    order. Shutdown follows the data: once every worker of a stage has
+    stopped, one None per worker is sent to the next stage.
+
+    Args:
+        source: Iterable of items for the first stage
+        stages: The stages, in order
+        sample_interval: Seconds between queue occupancy samples
+
+    Returns:
+        Tuple of (results in input order, report). The report has the
+        wall time, items, per-stage statistics (see stage_worker) and
+        per-queue occupancy (mean, max, fraction of samples full).
+    """
+    if not stages:
+        raise ValueError("A pipeline needs at least one stage")
+    # queues[i] feeds stage i; the last one feeds the parent
+    queues = [mp.Queue(maxsize=stage.queue_size) for stage in stages]
+    queues.append(mp.Queue(maxsize=stages[-1].queue_size))
+    stats_queue = mp.Queue()
+    groups = [[mp.Process(target=stage_worker,
+                          args=(i, stage.name, stage.func, queues[i], queues[i + 1],
+                                stats_queue),
+                          name=f"{stage.name}-{w}")
+               for w in range(stage.workers)]
+              for i, stage in enumerate(stages)]
+    for group in groups:
+        for process in group:
+            process.start()
+
+    fed = []
+    error = []
+
+    def feed() -> None:
+        # Runs in a thread: q.put blocks while stage 0 is behind, which
+        # throttles how fast the source is consumed
+        try:
+            count = 0
+            for item in source:
+                queues[0].put((count, item))
+                count += 1
+            fed.append(count)
+        except BaseException as exc:
+            error.append(exc)
+        finally:
+            for i, group in enumerate(groups):
+                for _ in group:
+                    queues[i].put(None)
+                for process in group:
+                    process.join()
+            queues[-1].put(None)
+
+    samples = [[] for _ in queues]
+    sampling = threading.Event()
+
+    def sample() -> None:
+        while not sampling.wait(sample_interval):
+            for q, history in zip(queues, samples):
+                size = _queue_size(q)
+                if size is not None:
+                    history.append(size)
+
+    start = time.perf_counter()
+    feeder = threading.Thread(target=feed, daemon=True)
+    sampler = threading.Thread(target=sample, daemon=True)
+    feeder.start()
+    sampler.start()
+
+    results = {}
+    while True:
+        message = queues[-1].get()
+        if message is None:
+            break
+        seq, item = message
+        results[seq] = item
+    wall = time.perf_counter() - start
+    sampling.set()
+    feeder.join()
+    sampler.join()
+    if error:
+        raise error[0]
+    failed = [(seq, item) for seq, item in sorted(results.items())
+              if isinstance(item, StageError)]
+    if failed:
+        seq, item = failed[0]
+        raise RuntimeError(f"Item {seq} failed in stage {item.stage!r}: {item.error} "
+                           f"({len(failed)} failed items)")
+
+    totals = [{"items": 0, "busy": 0.0, "starved": 0.0, "blocked": 0.0} for _ in stages]
+    for _ in range(sum(stage.workers for stage in stages)):
+        i, items, busy, starved, blocked = stats_queue.get()
+        for key, value in (("items", items), ("busy", busy),
+                           ("starved", starved), ("blocked", blocked)):
+            totals[i][key] += value
+
+    stage_reports = []
+    for stage, total in zip(stages, totals):
+        per_item = total["busy"] / total["items"] if total["items"] else 0.0
+        stage_reports.append({
+            "name": stage.name,
+            "workers": stage.workers,
+            "items": total["items"],
+            "per_item": per_item,
+            "throughput": total["items"] / wall if wall > 0 else 0.0,
+            # Items per second the stage could sustain if never starved or blocked
+            "capacity": stage.workers / per_item if per_item > 0 else math.inf,
+            "utilization": total["busy"] / (wall * stage.workers) if wall > 0 else 0.0,
+            "starved": total["starved"],
+            "blocked": total["blocked"],
+        })
+
+    queue_reports = []
+    for i, (q, history) in enumerate(zip(queues, samples)):
+        capacity = stages[i].queue_size if i < len(stages) else stages[-1].queue_size
+        queue_reports.append({
+            "into": stages[i].name if i < len(stages) else "output",
+            "capacity": capacity,
+            "mean": sum(history) / len(history) if history else None,
+            "max": max(history) if history else None,
+            "full": sum(size >= capacity for size in history) / len(history) if history else None,
+        })
+
+    bottleneck = min(stage_reports, key=lambda s: s["capacity"])["name"]
+    report = {"wall": wall, "items": fed[0], "stages": stage_reports,
+              "queues": queue_reports, "bottleneck": bottleneck}
+    return [results[seq] for seq in sorted(results)], report
+
+
+def balanced_workers(report: Dict[str, Any], total_workers: int) -> Dict[str, int]:
+    """
+    Split total_workers across the stages in proportion to their
+    measured cost per item, so every stage has about the same capacity
+    (at least one worker each).
+    """
+    costs = {s["name"]: s["per_item"] for s in report["stages"]}
+    total_cost = sum(costs.values())
+    if total_cost == 0 or total_workers <= len(costs):
+        return {name: 1 for name in costs}
+    shares = {name: cost / total_cost * total_workers for name, cost in costs.items()}
+    plan = {name: max(1, math.floor(share)) for name, share in shares.items()}
+    # Round so the plan uses exactly total_workers
+    while sum(plan.values()) < total_workers:
+        plan[max(plan, key=lambda n: shares[n] - plan[n])] += 1
+    while sum(plan.values()) > total_workers:
+        plan[min((n for n in plan if plan[n] > 1), key=lambda n: shares[n] - plan[n])] -= 1
+    return plan
+
+
+def print_pipeline_report(report: Dict[str, Any]) -> None:
+    """Print per-stage and per-queue tables."""
+    print(f"   {report['items']} items in {report['wall']:.3f} s "
+          f"({report['items'] / report['wall']:.1f} items/s)")
+    print("   Stage   | Workers | ms/item | Capacity/s | Util  | Starved (s) | Blocked (s)")
+    print("   " + "-" * 76)
+    for s in report["stages"]:
+        print(f"   {s['name']:7s} | {s['workers']:7d} | {1000 * s['per_item']:7.2f} | "
+              f"{s['capacity']:10.1f} | {100 * s['utilization']:4.0f}% | "
+              f"{s['starved']:11.3f} | {s['blocked']:11.3f}")
+    print("   Queue into | Capacity | Mean | Max | Full")
+    print("   " + "-" * 42)
+    for q in report["queues"]:
+        if q["mean"] is None:
+            print(f"   {q['into']:10s} | {q['capacity']:8d} | (qsize not supported)")
+            continue
+        print(f"   {q['into']:10s} | {q['capacity']:8d} | {q['mean']:4.1f} | {q['max']:3d} | "
+              f"{100 * q['full']:3.0f}%")
+    print(f"   Bottleneck: {report['bottleneck']}")
+
+
+# Stage functions for the video example (module level so that workers
+# can unpickle them)
+FRAME_SIZE = 20000
+
+
+def decode_frame(frame: int) -> List[float]:
+    """Read and decode one frame: simulated I/O, then the pixel values."""
+    time.sleep(0.02)
+    return generate_range(frame, 0, FRAME_SIZE)
+
+
+def encode_frame(pixels: List[float]) -> int:
+    """Compress one frame; returns the encoded size in bytes."""
+    return len(zlib.compress(array("d", pixels).tobytes(), 1))
+
+
+def video_pipeline(decoders: int = 1, filters: int = 1, encoders: int = 1,
+                   queue_size: int = 4) -> List[Stage]:
+    """Decode → filter (process_chunk on every pixel) → encode."""
+    return [
+        Stage("decode", decode_frame, decoders, queue_size),
+        kernel_stage("filter", process_chunk, 0.5, workers=filters, queue_size=queue_size),
+        Stage("encode", encode_frame, encoders, queue_size),
+    ]
+
+
+def demonstrate_pipeline(num_frames: int = 60):
+    """Find the bottleneck stage, then rebalance the workers."""
+    print("=" * 60)
+    print("PIPELINE PARALLELISM")
+    print("=" * 60)
+
+    print(f"\n1. Decode → filter → encode, {num_frames} frames, one worker per stage:")
+    _, report = run_pipeline(range(num_frames), video_pipeline())
+    print_pipeline_report(report)
+
+    # Decode is mostly waiting on (simulated) I/O, so extra decoders help
+    # even on a machine with few cores
+    total = 6
+    plan = balanced_workers(report, total)
+    print(f"\n2. Same {total} workers split by measured cost per item: {plan}")
+    sizes, report = run_pipeline(range(num_frames), video_pipeline(
+        plan["decode"], plan["filter"], plan["encode"]))
+    print_pipeline_report(report)
+    print(f"   Encoded {len(sizes)} frames in order, {sum(sizes) / 2**20:.1f} MiB")
+
+    print("\n   The bottleneck's input queue stays full and the stages before it")
+    print("   are blocked; the stages after it starve. Adding workers anywhere")
+    print("   else does not help.")
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+    demonstrate_pipeline()
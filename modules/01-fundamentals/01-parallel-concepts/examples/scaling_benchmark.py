@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+Scaling Benchmark Harness
+
+Repeatable strong- and weak-scaling measurements for the parallel demos.
+
+A single time.time() sample says little: it includes warmup effects,
+timer resolution and whatever else the machine was doing. This harness:
+1. Runs warmup iterations, then repeated trials timed with perf_counter
+2. Reports the median and a distribution-free confidence interval
+3. Derives strong- and weak-scaling efficiency against a real serial baseline
+4. Fits Amdahl (strong) and Gustafson (weak) serial fractions
+5. Writes JSON/CSV so results can be tracked across machines and commits
+
+Suites:
+    data  - data_parallel_demo.parallel_processing on a persistent pool
+    task  - task_parallel_demo.parallel_task_processing
+    mpi   - the mpi4py data_parallel.py example (Scatterv, multiply, Gatherv)
+            at N ranks against its own 1-rank run; pass
+            --mpirun-args "--oversubscribe" for more ranks than cores
+
+Run: python scaling_benchmark.py --suite data --workers 1 2 4 --json out.json
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import platform
+import shlex
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import multiprocessing as mp
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+MPI_DATA_PARALLEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..",
+                                 "..", "examples", "python", "mpi4py", "data_parallel.py")
+
+
+@dataclass
+class Measurement:
+    """Timing samples of one benchmark configuration (seconds)."""
+    samples: List[float] = field(default_factory=list)
+    confidence: float = 0.95
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+    @property
+    def ci(self) -> Tuple[float, float]:
+        return median_ci(self.samples, self.confidence)
+
+    @property
+    def coverage(self) -> float:
+        """Probability that `ci` covers the median; below `confidence` with few samples."""
+        return median_ci_coverage(len(self.samples), self.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        low, high = self.ci
+        return {
+            "median": self.median,
+            "mean": self.mean,
+            "stdev": self.stdev,
+            "ci_low": low,
+            "ci_high": high,
+            "confidence": self.confidence,
+            "coverage": self.coverage,
+            "repeats": len(self.samples),
+            "samples": list(self.samples),
+        }
+
+
+def _binom_half_cdf(n: int, k: int) -> float:
+    """P(B <= k) for B ~ Binomial(n, 1/2)."""
+    return sum(math.comb(n, i) for i in range(k + 1)) / 2 ** n
+
+
+def _median_ci_rank(n: int, confidence: float) -> int:
+    """Largest j such that [x_(j), x_(n-j+1)] still covers the median with `confidence`."""
+    alpha = 1.0 - confidence
+    # Narrow the interval one order statistic at a time while the chance
+    # of the median falling outside it stays within alpha
+    j = 1
+    while j + 1 <= (n + 1) // 2 and 2 * _binom_half_cdf(n, j) <= alpha:
+        j += 1
+    return j
+
+
+def median_ci(samples: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    """
+    Distribution-free confidence interval for the median.
+
+    Uses order statistics: the number of samples below the true median is
+    Binomial(n, 1/2), so [x_(j), x_(n-j+1)] covers it with probability
+    1 - 2 * P(B <= j - 1). Up to 8 samples this is the full sample range,
+    whose coverage only reaches 95% from 6 samples on; median_ci_coverage
+    gives the coverage actually achieved.
+    """
+    xs = sorted(samples)
+    n = len(xs)
+    if n == 0:
+        raise ValueError("median_ci() needs at least one sample")
+    j = _median_ci_rank(n, confidence)
+    return xs[j - 1], xs[n - j]
+
+
+def median_ci_coverage(n: int, confidence: float = 0.95) -> float:
+    """Coverage probability of median_ci's interval for n samples."""
+    if n == 0:
+        raise ValueError("median_ci_coverage() needs at least one sample")
+    return 1.0 - 2 * _binom_half_cdf(n, _median_ci_rank(n, confidence) - 1)
+
+
+def measure(func: Callable, args: tuple = (), warmup: int = 1, repeats: int = 6,
+            confidence: float = 0.95) -> Measurement:
+    """
+    Time func(*args) with perf_counter after `warmup` untimed calls.
+
+    Returns:
+        Measurement with `repeats` samples
+    """
+    for _ in range(warmup):
+        func(*args)
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return Measurement(samples, confidence)
+
+
+def fit_amdahl(workers: Sequence[int], speedups: Sequence[float]) -> float:
+    """
+    Least-squares serial fraction f of Amdahl's law S(p) = 1 / (f + (1 - f) / p).
+
+    Rearranged as 1/S - 1/p = f * (1 - 1/p), a line through the origin.
+    Points with p == 1 carry no information and are ignored.
+    """
+    xs = [1 - 1 / p for p in workers if p > 1]
+    ys = [1 / s - 1 / p for p, s in zip(workers, speedups) if p > 1 and s > 0]
+    if not xs or len(xs) != len(ys):
+        return float("nan")
+    return sum(x * y for x, y in zip(xs, ys)) / sum(x * x for x in xs)
+
+
+def fit_gustafson(workers: Sequence[int], scaled_speedups: Sequence[float]) -> float:
+    """
+    Least-squares serial fraction f of Gustafson's law S(p) = p - f * (p - 1).
+
+    Rearranged as p - S = f * (p - 1), a line through the origin.
+    """
+    xs = [p - 1 for p in workers if p > 1]
+    ys = [p - s for p, s in zip(workers, scaled_speedups) if p > 1]
+    if not xs:
+        return float("nan")
+    return sum(x * y for x, y in zip(xs, ys)) / sum(x * x for x in xs)
+
+
+def karp_flatt(speedup: float, workers: int) -> float:
+    """Experimentally determined serial fraction for one (p, S) point."""
+    if workers <= 1 or speedup <= 0:
+        return float("nan")
+    return (1 / speedup - 1 / workers) / (1 - 1 / workers)
+
+
+def strong_scaling_report(baseline: Measurement, measurements: Dict[int, Measurement],
+                          size: int) -> Dict[str, Any]:
+    """
+    Build a strong-scaling report from measurements taken elsewhere.
+
+    Args:
+        baseline: Serial run at `size`
+        measurements: Parallel runs at `size`, keyed by worker count
+
+    Returns:
+        Report with the baseline, one row per worker count (speedup,
+        efficiency, Karp-Flatt metric) and the fitted Amdahl fraction
+    """
+    rows = []
+    for workers, m in measurements.items():
+        speedup = baseline.median / m.median if m.median > 0 else 0.0
+        rows.append({
+            "kind": "strong",
+            "workers": workers,
+            "size": size,
+            **m.to_dict(),
+            "speedup": speedup,
+            "efficiency": speedup / workers,
+            "karp_flatt": karp_flatt(speedup, workers),
+        })
+
+    return {
+        "kind": "strong",
+        "size": size,
+        "baseline": baseline.to_dict(),
+        "rows": rows,
+        "amdahl_serial_fraction": fit_amdahl([r["workers"] for r in rows],
+                                             [r["speedup"] for r in rows]),
+    }
+
+
+def weak_scaling_report(baseline: Measurement, measurements: Dict[int, Measurement],
+                        base_size: int) -> Dict[str, Any]:
+    """
+    Build a weak-scaling report from measurements taken elsewhere.
+
+    Efficiency is T_serial(base_size) / T_p(base_size * p): 100% means the
+    larger problem took no longer on p workers than the base problem did
+    serially. Scaled speedup is p times that efficiency.
+
+    Args:
+        baseline: Serial run at `base_size`
+        measurements: Parallel runs at base_size * p, keyed by worker count p
+
+    Returns:
+        Report with the baseline, one row per worker count and the fitted
+        Gustafson serial fraction
+    """
+    rows = []
+    for workers, m in measurements.items():
+        efficiency = baseline.median / m.median if m.median > 0 else 0.0
+        rows.append({
+            "kind": "weak",
+            "workers": workers,
+            "size": base_size * workers,
+            **m.to_dict(),
+            "efficiency": efficiency,
+            "scaled_speedup": efficiency * workers,
+        })
+
+    return {
+        "kind": "weak",
+        "base_size": base_size,
+        "baseline": baseline.to_dict(),
+        "rows": rows,
+        "gustafson_serial_fraction": fit_gustafson([r["workers"] for r in rows],
+                                                   [r["scaled_speedup"] for r in rows]),
+    }
+
+
+def strong_scaling(run_parallel: Callable[[int, int], Any], size: int,
+                   workers_list: Sequence[int],
+                   run_sequential: Optional[Callable[[int], Any]] = None,
+                   warmup: int = 1, repeats: int = 6) -> Dict[str, Any]:
+    """
+    Fixed problem size, growing worker count.
+
+    Args:
+        run_parallel: Called as run_parallel(size, workers)
+        size: Problem size shared by every run
+        workers_list: Worker counts to measure
+        run_sequential: Serial baseline, called as run_sequential(size);
+            defaults to run_parallel(size, 1)
+
+    Returns:
+        See strong_scaling_report
+    """
+    if run_sequential is None:
+        def run_sequential(n: int):
+            return run_parallel(n, 1)
+    baseline = measure(run_sequential, (size,), warmup, repeats)
+    measurements = {workers: measure(run_parallel, (size, workers), warmup, repeats)
+                    for workers in workers_list}
+    return strong_scaling_report(baseline, measurements, size)
+
+
+def weak_scaling(run_parallel: Callable[[int, int], Any], base_size: int,
+                 workers_list: Sequence[int],
+                 run_sequential: Optional[Callable[[int], Any]] = None,
+                 warmup: int = 1, repeats: int = 6) -> Dict[str, Any]:
+    """
+    Fixed problem size per worker (base_size * workers in total).
+
+    Returns:
+        See weak_scaling_report
+    """
+    if run_sequential is None:
+        def run_sequential(n: int):
+            return run_parallel(n, 1)
+    baseline = measure(run_sequential, (base_size,), warmup, repeats)
+    measurements = {workers: measure(run_parallel, (base_size * workers, workers),
+                                     warmup, repeats)
+                    for workers in workers_list}
+    return weak_scaling_report(baseline, measurements, base_size)
+
+
+def machine_info() -> Dict[str, Any]:
+    """Metadata identifying where and when a report was produced."""
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "cpu_count": mp.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def _ci_label(rows: Sequence[Dict[str, Any]]) -> str:
+    """CI column header with the lowest coverage the rows actually achieve."""
+    coverage = min((r["coverage"] for r in rows), default=0.0)
+    return f"{coverage * 100:.4g}% CI (s)"
+
+
+def print_report(suite: str, strong: Dict[str, Any],
+                 weak: Optional[Dict[str, Any]] = None) -> None:
+    """Print the strong and weak scaling tables of one suite."""
+    print(f"\n[{suite}] Strong Scaling (size = {strong['size']:,}, "
+          f"serial median = {strong['baseline']['median']:.4f} s):")
+    print(f"Workers | Median (s) | {_ci_label(strong['rows']):^20s} | Speedup | Efficiency | "
+          f"Karp-Flatt")
+    print("-" * 80)
+    for r in strong["rows"]:
+        print(f"{r['workers']:7d} | {r['median']:10.4f} | [{r['ci_low']:8.4f}, {r['ci_high']:8.4f}] | "
+              f"{r['speedup']:7.2f} | {r['efficiency'] * 100:9.1f}% | {r['karp_flatt']:10.3f}")
+    print(f"Amdahl serial fraction: {strong['amdahl_serial_fraction']:.3f}")
+    if weak is None:
+        return
+
+    print(f"\n[{suite}] Weak Scaling (size per worker = {weak['base_size']:,}, "
+          f"serial median = {weak['baseline']['median']:.4f} s):")
+    print(f"Workers | Total Size | Median (s) | {_ci_label(weak['rows']):^20s} | Efficiency | "
+          f"Scaled")
+    print("-" * 80)
+    for r in weak["rows"]:
+        print(f"{r['workers']:7d} | {r['size']:10d} | {r['median']:10.4f} | "
+              f"[{r['ci_low']:8.4f}, {r['ci_high']:8.4f}] | {r['efficiency'] * 100:9.1f}% | "
+              f"{r['scaled_speedup']:6.2f}")
+    print(f"Gustafson serial fraction: {weak['gustafson_serial_fraction']:.3f}")
+
+
+def write_json(report: Dict[str, Any], path: str) -> None:
+    """Write a full report (metadata, suites, samples) as JSON."""
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+CSV_FIELDS = ["suite", "kind", "workers", "size", "median", "mean", "stdev",
+              "ci_low", "ci_high", "coverage", "repeats", "speedup", "efficiency",
+              "karp_flatt", "scaled_speedup", "hostname", "timestamp"]
+
+
+def write_csv(report: Dict[str, Any], path: str) -> None:
+    """Write one CSV row per (suite, scaling kind, worker count)."""
+    meta = report["machine"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for suite, results in report["suites"].items():
+            for kind in ("strong", "weak"):
+                for row in results.get(kind, {}).get("rows", []):
+                    writer.writerow({"suite": suite, **row,
+                                     "hostname": meta["hostname"],
+                                     "timestamp": meta["timestamp"]})
+
+
+def data_parallel_suite(workers_list: Sequence[int], size: int = 1000000,
+                        backend: str = "python", warmup: int = 1,
+                        repeats: int = 6) -> Dict[str, Any]:
+    """Scaling of data_parallel_demo.parallel_processing on a warm pool."""
+    from data_parallel_demo import parallel_processing, sequential_processing
+    from input_generation import generate_data
+    from worker_pool import WorkerPool
+
+    base_size = size // max(workers_list)
+    inputs = {}
+
+    with WorkerPool(max(workers_list)) as pool:
+        # Every size is generated up front on the pool, outside the timed
+        # region, with the same seed (and so the same values) as the demos
+        for n in {size, base_size, *(base_size * workers for workers in workers_list)}:
+            inputs[n] = generate_data(n, seed=42, backend=backend, pool=pool)
+
+        def run_parallel(n: int, workers: int):
+            pool.resize(workers)
+            return parallel_processing(inputs[n], 2.5, workers, backend, pool=pool)
+
+        def run_sequential(n: int):
+            return sequential_processing(inputs[n], 2.5, backend)
+
+        # Start every pool size once so startup stays out of the samples
+        for workers in workers_list:
+            pool.resize(workers)
+        strong = strong_scaling(run_parallel, size, workers_list, run_sequential,
+                                warmup, repeats)
+        weak = weak_scaling(run_parallel, base_size, workers_list,
+                            run_sequential, warmup, repeats)
+    return {"strong": strong, "weak": weak}
+
+
+def task_parallel_suite(workers_list: Sequence[int], num_tasks: int = 16,
+                        warmup: int = 1, repeats: int = 6) -> Dict[str, Any]:
+    """Scaling of task_parallel_demo.parallel_task_processing."""
+    from task_parallel_demo import (TaskType, parallel_task_processing,
+                                    sequential_task_processing)
+
+    kinds = [(TaskType.CALCULATE_SQUARE, 5), (TaskType.CALCULATE_CUBE, 3),
+             (TaskType.CALCULATE_FACTORIAL, 20), (TaskType.PROCESS_STRING, "hello")]
+
+    def make_tasks(n: int) -> List[Dict]:
+        return [{"type": kinds[i % len(kinds)][0], "data": kinds[i % len(kinds)][1]}
+                for i in range(n)]
+
+    def run_parallel(n: int, workers: int):
+        return parallel_task_processing(make_tasks(n), workers)
+
+    def run_sequential(n: int):
+        return sequential_task_processing(make_tasks(n))
+
+    strong = strong_scaling(run_parallel, num_tasks, workers_list, run_sequential,
+                            warmup, repeats)
+    weak = weak_scaling(run_parallel, max(1, num_tasks // max(workers_list)),
+                        workers_list, run_sequential, warmup, repeats)
+    return {"strong": strong, "weak": weak}
+
+
+def mpi_suite(workers_list: Sequence[int], size: int = 10000000,
+              script: str = MPI_DATA_PARALLEL, warmup: int = 1, repeats: int = 6,
+              mpirun_args: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Scaling of the mpi4py data_parallel.py example over MPI ranks.
+
+    Each rank count is one mpirun launch; the samples are the script's
+    own timings of its Scatterv/multiply/Gatherv loop, so interpreter
+    and MPI startup stay out of them. The baseline is the same program
+    on a single rank, so speedup compares equal work. Returns None when
+    mpirun or mpi4py is unavailable.
+
+    Args:
+        size: Elements for strong scaling; weak scaling gives every rank
+            size // max(workers_list)
+        mpirun_args: Extra mpirun arguments, e.g. "--oversubscribe"
+            (Open MPI) to run more ranks than cores
+    """
+    mpirun = shutil.which("mpirun") or shutil.which("mpiexec")
+    try:
+        import mpi4py  # noqa: F401
+    except ImportError:
+        mpirun = None
+    if mpirun is None:
+        return None
+
+    def launch(ranks: int, n: int) -> Measurement:
+        command = [mpirun, *shlex.split(mpirun_args), "-np", str(ranks),
+                   sys.executable, script, "--size", str(n), "--warmup", str(warmup),
+                   "--repeats", str(repeats), "--json"]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        return Measurement(json.loads(output.strip().splitlines()[-1])["total"])
+
+    base_size = size // max(workers_list)
+    strong = {ranks: launch(ranks, size) for ranks in workers_list}
+    weak = {ranks: launch(ranks, base_size * ranks) for ranks in workers_list}
+    # The 1-rank runs are the baselines; reuse them when they were measured
+    strong_baseline = strong[1] if 1 in strong else launch(1, size)
+    weak_baseline = weak[1] if 1 in weak else launch(1, base_size)
+    return {"strong": strong_scaling_report(strong_baseline, strong, size),
+            "weak": weak_scaling_report(weak_baseline, weak, base_size)}
+
+
+SUITES = {
+    "data": data_parallel_suite,
+    "task": task_parallel_suite,
+    "mpi": mpi_suite,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--suite", choices=list(SUITES) + ["all"], default="data")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=6,
+                        help="trials per configuration (6 or more for a 95%% median CI)")
+    parser.add_argument("--json", help="write the full report to this JSON file")
+    parser.add_argument("--csv", help="write one row per measurement to this CSV file")
+    parser.add_argument("--mpirun-args", default="",
+                        help="extra mpirun arguments for the mpi suite, e.g. '--oversubscribe'")
+    args = parser.parse_args(argv)
+
+    print(f"System has {mp.cpu_count()} CPU cores")
+    names = list(SUITES) if args.suite == "all" else [args.suite]
+    report = {"machine": machine_info(), "suites": {}}
+    for name in names:
+        options = {"mpirun_args": args.mpirun_args} if name == "mpi" else {}
+        results = SUITES[name](args.workers, warmup=args.warmup, repeats=args.repeats,
+                               **options)
+        if results is None:
+            print(f"\n[{name}] skipped (requirements not available)")
+            continue
+        report["suites"][name] = results
+        print_report(name, results["strong"], results.get("weak"))
+
+    if args.json:
+        write_json(report, args.json)
+        print(f"\nJSON report written to {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"CSV report written to {args.csv}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
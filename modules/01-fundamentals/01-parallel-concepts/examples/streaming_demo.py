@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Streaming Data Parallelism Demonstration
+
+parallel_processing needs the whole input as one list and returns the
+whole output as another, so the data size is limited to a fraction of
+RAM. This example streams instead:
+
+1. Fixed-size chunks are pulled from a generator or a memory-mapped file
+2. At most `max_in_flight` chunks are being processed at any time; the
+   producer is only asked for the next chunk when one completes
+   (backpressure, like a bounded Pool.imap)
+3. Results are handed to an output sink in input order
+
+Memory then depends on chunk size and in-flight depth, not on the input
+size, which can grow to many GB.
+
+Outputs that are only written to a sink can still be verified: pass a
+Digest with a reference (see verification.py) and each chunk's digest,
+computed by its worker, is checked as it arrives.
+"""
+
+import os
+import random
+import tempfile
+import time
+import multiprocessing as mp
+from array import array
+from collections import deque
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from data_parallel_demo import MemoryMonitor, check_backend, np, process_chunk
+from verification import ChunkDigest, Digest, digest_chunk, digest_stream
+from worker_pool import WorkerPool
+
+
+class FileRegion(NamedTuple):
+    """A run of float64 values in a raw binary file, read by the worker itself."""
+    path: str
+    start: int
+    count: int
+
+
+def iter_chunks(data: Iterable[float], chunk_size: int = 65536,
+                backend: str = "python") -> Iterator:
+    """Group any iterable of floats into chunks of `chunk_size`."""
+    check_backend(backend)
+    chunk = array("d")
+    for x in data:
+        chunk.append(x)
+        if len(chunk) == chunk_size:
+            yield np.frombuffer(chunk, dtype=np.float64) if backend == "numpy" else chunk.tolist()
+            chunk = array("d")
+    if chunk:
+        yield np.frombuffer(chunk, dtype=np.float64) if backend == "numpy" else chunk.tolist()
+
+
+def random_chunks(n: int, chunk_size: int = 65536, seed: int = 42,
+                  backend: str = "python") -> Iterator:
+    """Generate n uniform random floats lazily, one chunk at a time."""
+    check_backend(backend)
+    if backend == "numpy":
+        rng = np.random.default_rng(seed)
+    else:
+        rng = random.Random(seed)
+    for start in range(0, n, chunk_size):
+        count = min(chunk_size, n - start)
+        if backend == "numpy":
+            yield rng.random(count)
+        else:
+            yield [rng.random() for _ in range(count)]
+
+
+def file_regions(path: str, chunk_size: int = 65536) -> Iterator[FileRegion]:
+    """
+    Describe a raw float64 file as chunk-sized regions.
+
+    Only (path, offset, count) crosses the process boundary; each worker
+    maps or reads its own region, so the parent never touches the data.
+    """
+    n = os.path.getsize(path) // 8
+    for start in range(0, n, chunk_size):
+        yield FileRegion(path, start, min(chunk_size, n - start))
+
+
+def write_float64_file(path: str, chunks: Iterable) -> int:
+    """Write chunks of floats to a raw float64 file; return the element count."""
+    count = 0
+    with open(path, "wb") as f:
+        for chunk in chunks:
+            values = chunk if np is not None and isinstance(chunk, np.ndarray) else array("d", chunk)
+            values.tofile(f)
+            count += len(values)
+    return count
+
+
+def read_region(region: FileRegion, backend: str = "python"):
+    """Load one FileRegion (memory-mapped for the numpy backend)."""
+    if backend == "numpy":
+        return np.memmap(region.path, dtype=np.float64, mode="r",
+                         offset=region.start * 8, shape=(region.count,))
+    values = array("d")
+    with open(region.path, "rb") as f:
+        f.seek(region.start * 8)
+        values.fromfile(f, region.count)
+    return values
+
+
+def process_stream_chunk(chunk: Any, multiplier: float, backend: str = "python"):
+    """Worker side: resolve a FileRegion if needed, then apply process_chunk."""
+    if isinstance(chunk, FileRegion):
+        chunk = read_region(chunk, backend)
+    return process_chunk(chunk, multiplier, backend)
+
+
+def process_digested_stream_chunk(chunk: Any, start: int, multiplier: float,
+                                  backend: str = "python",
+                                  tolerance: Optional[float] = None) -> Tuple[Any, ChunkDigest]:
+    """Worker side of a verified stream: the result chunk and its digest."""
+    result = process_stream_chunk(chunk, multiplier, backend)
+    return result, digest_chunk(result, start, tolerance)
+
+
+class Float64FileSink:
+    """Output sink that appends result chunks to a raw float64 file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "wb")
+
+    def __call__(self, chunk) -> None:
+        values = chunk if np is not None and isinstance(chunk, np.ndarray) else array("d", chunk)
+        values.tofile(self._file)
+        self.count += len(values)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "Float64FileSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def stream_processing(source: Iterable, multiplier: float, sink: Callable[[Any], None],
+                      num_workers: int = 4, max_in_flight: Optional[int] = None,
+                      backend: str = "python",
+                      pool: Optional[WorkerPool] = None,
+                      digests: Optional[Digest] = None) -> int:
+    """
+    Process a stream of chunks in parallel with bounded in-flight work.
+
+    Args:
+        source: Iterable of chunks (lists, arrays or FileRegions)
+        multiplier: Value to multiply each element by
+        sink: Called with each result chunk, in input order
+        num_workers: Worker processes (ignored when `pool` is given)
+        max_in_flight: Chunks submitted but not yet written to the sink;
+            defaults to twice the number of workers so each worker has
+            one chunk running and one queued
+        backend: "python" or "numpy"
+        pool: Optional warm WorkerPool
+        digests: Optional Digest; each worker also digests its result
+            chunk, and with a reference Digest mismatches are recorded
+            as the chunks arrive (see verification.py)
+
+    Returns:
+        Number of elements written to the sink
+    """
+    check_backend(backend)
+    owns_pool = pool is None
+    if owns_pool:
+        pool = WorkerPool(num_workers)
+    max_in_flight = max_in_flight or 2 * pool.num_workers
+
+    in_flight = deque()
+    written = 0
+    submitted = 0
+
+    def deliver() -> int:
+        result = in_flight.popleft().get()
+        if digests is not None:
+            result, digest = result
+            digests.add(digest)
+        sink(result)
+        return len(result)
+
+    try:
+        for chunk in source:
+            # Backpressure: wait for the oldest chunk before taking another
+            if len(in_flight) >= max_in_flight:
+                written += deliver()
+            if digests is None:
+                in_flight.append(pool.apply_async(process_stream_chunk,
+                                                  (chunk, multiplier, backend)))
+            else:
+                in_flight.append(pool.apply_async(process_digested_stream_chunk,
+                                                  (chunk, submitted, multiplier, backend,
+                                                   digests.tolerance)))
+                submitted += chunk.count if isinstance(chunk, FileRegion) else len(chunk)
+        while in_flight:
+            written += deliver()
+    finally:
+        if owns_pool:
+            pool.close()
+    return written
+
+
+def benchmark_streaming(sizes=(1000000, 4000000, 16000000), chunk_size: int = 262144,
+                        backend: str = "python", num_workers: Optional[int] = None):
+    """
+    Stream a float64 file through the workers into another file.
+
+    Peak memory (parent plus workers) should stay flat as the input grows.
+
+    Returns:
+        Mapping of input size to time, throughput and peak bytes
+    """
+    num_workers = num_workers or mp.cpu_count()
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp, WorkerPool(num_workers) as pool:
+        for n in sizes:
+            in_path = os.path.join(tmp, f"input_{n}.f64")
+            out_path = os.path.join(tmp, f"output_{n}.f64")
+            write_float64_file(in_path, random_chunks(n, chunk_size, backend=backend))
+
+            with MemoryMonitor() as mon, Float64FileSink(out_path) as sink:
+                start = time.perf_counter()
+                written = stream_processing(file_regions(in_path, chunk_size), 2.5, sink,
+                                            backend=backend, pool=pool)
+                elapsed = time.perf_counter() - start
+            assert written == n, "Lost elements in the stream!"
+            report[n] = {"time": elapsed, "throughput": n / elapsed,
+                         "peak_bytes": mon.peak_bytes,
+                         "input_bytes": os.path.getsize(in_path)}
+            os.remove(in_path)
+            os.remove(out_path)
+    return report
+
+
+def demonstrate_streaming():
+    """Show constant memory while the streamed input grows."""
+    print("=" * 60)
+    print("STREAMING DATA PARALLELISM")
+    print("=" * 60)
+
+    print("\n1. Generator source (no list is ever materialized):")
+    total = []
+    stream_processing(random_chunks(10, chunk_size=4), 2.0, total.extend, num_workers=2)
+    print(f"   10 random values in chunks of 4 -> {len(total)} results, in order")
+
+    print("\n2. Verified stream (outputs discarded, digests checked on arrival):")
+    n = 1000000
+    reference = digest_stream(process_chunk(chunk, 2.5) for chunk in random_chunks(n))
+    digests = Digest(reference=reference)
+    stream_processing(random_chunks(n), 2.5, lambda chunk: None, num_workers=2,
+                      digests=digests)
+    print(f"   {digests.count:,} elements in {len(digests.chunks)} chunks, "
+          f"mismatched chunks: {digests.mismatches or 'none'}")
+
+    backend = "numpy" if np is not None else "python"
+    print(f"\n3. Memory-mapped file source ({backend} backend):")
+    print("   Elements   | Input (MiB) | Time (s) | Melem/s | Peak memory (MiB)")
+    print("   " + "-" * 66)
+    for n, stats in benchmark_streaming(backend=backend).items():
+        print(f"   {n:10d} | {stats['input_bytes'] / 2**20:11.1f} | {stats['time']:8.3f} | "
+              f"{stats['throughput'] / 1e6:7.2f} | {stats['peak_bytes'] / 2**20:17.1f}")
+    print("\n   Peak memory tracks chunk size x in-flight depth, not input size.")
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+    demonstrate_streaming()
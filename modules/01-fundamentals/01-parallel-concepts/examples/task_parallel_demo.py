@@ -8,13 +8,24 @@ on the same or different data simultaneously.
 Task parallelism: Different operations executed concurrently
 """
 
+import pickle
 import time
 import multiprocessing as mp
 import threading
 import queue
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple
 from enum import Enum
 import random
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing.managers import BaseManager
+
+from affinity import Placement, format_affinity, pin_current_process, placement_cpus
+from factorial import factorial
+from tracing import Tracer, timed_call, trace_span
+from worker_pool import (EXECUTORS, WorkerPool, check_executor, current_worker_name,
+                         free_threaded_build, gil_enabled)
 
 
 class TaskType(Enum):
@@ -38,13 +49,18 @@ def calculate_cube(x: int) -> int:
     return x * x * x
 
 
-def calculate_factorial(x: int) -> int:
-    """Calculate factorial (simulate heavy computation)."""
+def calculate_factorial(x: Any) -> int:
+    """
+    Calculate factorial (simulate heavy computation).
+    
+    `x` is n, or (n, method) to pick a kernel from
+    factorial.FACTORIAL_METHODS ("naive" is the one-at-a-time loop). The
+    default product tree stays fast for the large n where the loop
+    would dwarf the simulated sleep.
+    """
     time.sleep(0.2)  # Simulate computation time
-    result = 1
-    for i in range(1, x + 1):
-        result *= i
-    return result
+    n, method = x if isinstance(x, tuple) else (x, "product_tree")
+    return factorial(n, method)
 
 
 def process_string(s: str) -> str:
@@ -63,103 +79,765 @@ def fetch_data(task_id: int) -> Dict[str, Any]:
     }
 
 
-def sequential_task_processing(tasks: List[Dict]) -> List[Any]:
-    """Process tasks sequentially."""
+# Task registry: maps a task type to the function that runs it. Workers
+# look tasks up here, so a new task type only needs register_task().
+TASK_REGISTRY: Dict[Enum, Callable[[Any], Any]] = {}
+
+# Compact type ids, assigned in registration order. Built-in types are
+# registered at import time, so ids agree between parent and workers.
+TASK_TYPES: List[Enum] = []
+TASK_TYPE_IDS: Dict[Enum, int] = {}
+
+# Task types whose output depends only on their input, safe to memoize
+PURE_TASK_TYPES = set()
+
+
+def register_task(task_type: Enum, func: Callable[[Any], Any], pure: bool = False) -> None:
+    """
+    Register the function that executes tasks of `task_type`.
+    
+    Mark deterministic, side-effect free functions as `pure` to make
+    their results eligible for the result cache.
+    
+    Register at module level (as below) so that workers started with the
+    spawn or forkserver start methods see the same registry.
+    """
+    if task_type not in TASK_TYPE_IDS:
+        TASK_TYPE_IDS[task_type] = len(TASK_TYPES)
+        TASK_TYPES.append(task_type)
+    TASK_REGISTRY[task_type] = func
+    if pure:
+        PURE_TASK_TYPES.add(task_type)
+    else:
+        PURE_TASK_TYPES.discard(task_type)
+
+
+register_task(TaskType.CALCULATE_SQUARE, calculate_square, pure=True)
+register_task(TaskType.CALCULATE_CUBE, calculate_cube, pure=True)
+register_task(TaskType.CALCULATE_FACTORIAL, calculate_factorial, pure=True)
+# Random output / external state: never cached
+register_task(TaskType.PROCESS_STRING, process_string)
+register_task(TaskType.FETCH_DATA, fetch_data)
+
+
+class MicroTaskType(Enum):
+    """Near-zero cost tasks, for measuring dispatch overhead."""
+    INCREMENT = "increment"
+
+
+def increment(x: int) -> int:
+    """Trivial task: all of its cost is dispatch overhead."""
+    return x + 1
+
+
+register_task(MicroTaskType.INCREMENT, increment, pure=True)
+
+
+class LRUCache:
+    """
+    Size-bounded least-recently-used result cache with counters.
+    
+    Meant to live in a CacheManager server process so that every worker
+    shares one cache; the manager serves calls from several threads,
+    hence the lock. Two workers missing the same key at the same time
+    both compute it (no in-flight de-duplication).
+    """
+    
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+    
+    def get(self, key: Any) -> Tuple[bool, Any]:
+        """Return (found, value) and mark the entry as recently used."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+    
+    def put(self, key: Any, value: Any) -> None:
+        """Insert a value, evicting the least recently used beyond the bound."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss and eviction counters plus current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "size": len(self._entries),
+                    "max_entries": self.max_entries}
+
+
+class CacheManager(BaseManager):
+    """
+    Hosts an LRUCache shared across processes.
+    
+    Usage:
+        with CacheManager() as manager:
+            cache = manager.LRUCache(256)
+            parallel_task_processing(tasks, 4, cache=cache)
+            print(cache.stats())
+    """
+
+
+CacheManager.register("LRUCache", LRUCache)
+
+
+def run_task(task_type: Enum, data: Any, cache: Optional[LRUCache] = None) -> Any:
+    """
+    Execute one task through the registry (None for unknown types).
+    
+    With a cache, results of pure task types are looked up first and
+    stored after computing; other types always run.
+    """
+    func = TASK_REGISTRY.get(task_type)
+    if func is None:
+        return None
+    if cache is None or task_type not in PURE_TASK_TYPES:
+        return func(data)
+    
+    key = (task_type.value, data)
+    found, value = cache.get(key)
+    if not found:
+        value = func(data)
+        cache.put(key, value)
+    return value
+
+
+def encode_task(task: Dict) -> Tuple[int, Any]:
+    """Compact wire format of a task: (type id, payload)."""
+    return TASK_TYPE_IDS[task["type"]], task["data"]
+
+
+def sequential_task_processing(tasks: List[Dict],
+                               cache: Optional[LRUCache] = None) -> List[Any]:
+    """Process tasks sequentially (optionally memoizing pure task types)."""
     results = []
     for task in tasks:
         task_type = task["type"]
         data = task["data"]
         
-        if task_type == TaskType.CALCULATE_SQUARE:
-            result = calculate_square(data)
-        elif task_type == TaskType.CALCULATE_CUBE:
-            result = calculate_cube(data)
-        elif task_type == TaskType.CALCULATE_FACTORIAL:
-            result = calculate_factorial(data)
-        elif task_type == TaskType.PROCESS_STRING:
-            result = process_string(data)
-        elif task_type == TaskType.FETCH_DATA:
-            result = fetch_data(data)
-        else:
-            result = None
-        
         results.append({
             "task": task_type.value,
             "input": data,
-            "output": result
+            "output": run_task(task_type, data, cache)
         })
     
     return results
 
 
-def worker(task_queue: mp.Queue, result_queue: mp.Queue):
-    """Worker function for parallel task processing."""
+def execute_task(task: Dict) -> Dict[str, Any]:
+    """Run a single task inside a pool worker and tag it with the worker name."""
+    result = sequential_task_processing([task])[0]
+    result["worker"] = current_worker_name()
+    return result
+
+
+def execute_batch(batch: List[Tuple[int, int, Any]],
+                  cache: Optional[LRUCache] = None) -> Tuple[str, List[Tuple[int, Any]]]:
+    """
+    Run a batch of encoded (index, type id, payload) tasks.
+    
+    Returns:
+        (worker name, [(index, output), ...]); the parent already knows
+        each task's type and input, so they are not sent back
+    """
+    return current_worker_name(), [(index, run_task(TASK_TYPES[type_id], data, cache))
+                                   for index, type_id, data in batch]
+
+
+def make_batches(tasks: List[Dict], batch_size: int = 1) -> List[List[Tuple[int, int, Any]]]:
+    """Encode tasks and group them into batches of `batch_size`."""
+    encoded = [(index, *encode_task(task)) for index, task in enumerate(tasks)]
+    return [encoded[i:i + batch_size] for i in range(0, len(encoded), batch_size)]
+
+
+def worker(task_queue: mp.Queue, result_queue: mp.Queue,
+           cache: Optional[LRUCache] = None, trace: bool = False,
+           cpu: Optional[int] = None):
+    """
+    Worker function for parallel task processing.
+    
+    With `trace`, batches arrive pickled by the parent and results go
+    back pickled here, so that serialization is timed on its own instead
+    of inside the queue calls; each result message also carries this
+    worker's queue-wait, unpickle, compute and pickle spans for the
+    parent's Tracer. With `cpu`,
+    the worker pins itself to that CPU first (see affinity.py); if that
+    fails, the error goes to result_queue in place of a result.
+    """
+    try:
+        pin_current_process(cpu)
+    except OSError as exc:
+        result_queue.put(exc)
+        return
     while True:
-        try:
-            task = task_queue.get(timeout=1)
-            if task is None:  # Poison pill to stop worker
-                break
-                
-            task_type = task["type"]
-            data = task["data"]
+        wait_start = time.perf_counter() if trace else 0.0
+        # Block until a batch arrives: a timeout here would make slow-starting
+        # workers quit early and drop tasks; the poison pill ends the loop
+        batch = task_queue.get()
+        if batch is None:  # Poison pill to stop worker
+            break
+        
+        # One message in, one message out, however many tasks it carries
+        if not trace:
+            result_queue.put(execute_batch(batch, cache))
+            continue
+        start = time.perf_counter()
+        batch = pickle.loads(batch)
+        compute_start = time.perf_counter()
+        worker_name, outputs = execute_batch(batch, cache)
+        compute_end = time.perf_counter()
+        payload = pickle.dumps((worker_name, outputs), protocol=pickle.HIGHEST_PROTOCOL)
+        spans = [("queue_wait", "wait", wait_start, start),
+                 ("unpickle", "serialize", start, compute_start),
+                 ("compute", "compute", compute_start, compute_end),
+                 ("pickle", "serialize", compute_end, time.perf_counter())]
+        result_queue.put((payload, spans))
+
+
+def iter_task_results(tasks: List[Dict], num_workers: int = 4,
+                      pool: Optional[WorkerPool] = None,
+                      batch_size: int = 1,
+                      cache: Optional[LRUCache] = None,
+                      tracer: Optional[Tracer] = None,
+                      executor: str = "process",
+                      ordered: bool = False,
+                      max_in_flight: Optional[int] = None,
+                      stats: Optional[Dict[str, Any]] = None,
+                      placement: Placement = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield task results as they complete (see parallel_task_processing).
+    
+    Each result carries "seq", the index of its task in `tasks`.
+    
+    Args:
+        ordered: Yield results in task order. Results that finish early
+            wait in a reorder buffer until every earlier one is out.
+        max_in_flight: Batches submitted but not yet yielded. New batches
+            are only dispatched below this bound, so the reorder buffer
+            never holds more than max_in_flight - 1 batches. Defaults to
+            unbounded (everything queued at once) when unordered and to
+            2 * num_workers when ordered.
+        stats: Optional dict that receives "first_result" (seconds from
+            the first next() to the first result), "reorder_peak"
+            (largest number of results held in the reorder buffer) and
+            "affinity" (worker name -> CPUs; None for threads)
+        placement: Pin the worker processes started here: "compact",
+            "scatter" or a list of CPU ids (a `pool` brings its own)
+    
+    Closing the generator early stops the workers it started.
+    """
+    check_executor(executor)
+    start_time = time.perf_counter()
+    with trace_span(tracer, "encode"):
+        batches = make_batches(tasks, batch_size)
+    if max_in_flight is None:
+        max_in_flight = 2 * num_workers if ordered else max(len(batches), 1)
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+    if stats is not None:
+        stats.update(first_result=None, reorder_peak=0,
+                     affinity=pool.affinity if pool is not None and executor == "process" else None)
+    
+    pending = iter(batches)
+    done = queue.Queue()  # Completed batches from threads or pool callbacks
+    workers = []
+    threads = None
+    futures = []
+    stopped = False
+    
+    if executor == "thread" or pool is not None:
+        func = partial(execute_batch, cache=cache)
+        if tracer is not None:
+            func = partial(timed_call, func)
+        if executor == "thread":
+            threads = ThreadPoolExecutor(max_workers=num_workers)
+        
+        def submit() -> bool:
+            batch = next(pending, None)
+            if batch is None:
+                return False
+            if threads is not None:
+                futures.append(threads.submit(func, batch))
+                futures[-1].add_done_callback(done.put)
+            else:
+                pool.apply_async(func, (batch,), callback=done.put, error_callback=done.put)
+            return True
+        
+        def receive() -> tuple:
+            item = done.get()
+            if threads is not None:
+                item = item.result()  # A future; re-raises the task's exception
+            elif isinstance(item, BaseException):
+                raise item
+            if tracer is None:
+                return item
+            (worker_name, outputs), (_, t0, t1) = item
+            return worker_name, outputs, [("compute", "compute", t0, t1)]
+    else:
+        task_queue = mp.Queue()
+        result_queue = mp.Queue()
+        
+        def submit() -> bool:
+            nonlocal stopped
+            batch = next(pending, None)
+            if batch is None:
+                # Add poison pills to stop workers, after the last batch
+                if not stopped:
+                    for _ in range(num_workers):
+                        task_queue.put(None)
+                    stopped = True
+                return False
+            if tracer is not None:
+                # mp.Queue would pickle in its feeder thread, out of sight
+                # of the trace; pickling here gives it its own span
+                with trace_span(tracer, "pickle", category="serialize"):
+                    batch = pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL)
+            task_queue.put(batch)
+            return True
+        
+        def receive() -> tuple:
+            item = result_queue.get()
+            if isinstance(item, BaseException):  # A worker failed to start
+                raise item
+            if tracer is None:
+                return item
+            payload, spans = item
+            with trace_span(tracer, "unpickle", category="serialize"):
+                worker_name, outputs = pickle.loads(payload)
+            return worker_name, outputs, spans
+    
+    outstanding = 0      # Submitted, not yet yielded (in flight or buffered)
+    buffered = {}        # Batch number -> results waiting for earlier batches
+    buffered_count = 0
+    next_batch = 0
+    finished = False
+    try:
+        # Add tasks to queue (all of them unless bounded)
+        with trace_span(tracer, "enqueue"):
+            while outstanding < max_in_flight and submit():
+                outstanding += 1
+        
+        # Create and start workers
+        if threads is None and pool is None:
+            with trace_span(tracer, "spawn"):
+                for cpu in placement_cpus(num_workers, placement):
+                    w = mp.Process(target=worker,
+                                   args=(task_queue, result_queue, cache, tracer is not None,
+                                         cpu))
+                    w.start()
+                    workers.append(w)
+                    if stats is not None:
+                        stats["affinity"] = stats["affinity"] or {}
+                        stats["affinity"][w.name] = [cpu] if cpu is not None else None
+        
+        collect_start = time.perf_counter()
+        received = 0
+        while received < len(batches):
+            worker_name, outputs, *spans = receive()
+            received += 1
+            for name, category, t0, t1 in (spans[0] if spans else ()):
+                tracer.add(name, t0, t1, worker_name, category, tasks=len(outputs))
             
-            # Execute appropriate function based on task type
-            if task_type == TaskType.CALCULATE_SQUARE:
-                result = calculate_square(data)
-            elif task_type == TaskType.CALCULATE_CUBE:
-                result = calculate_cube(data)
-            elif task_type == TaskType.CALCULATE_FACTORIAL:
-                result = calculate_factorial(data)
-            elif task_type == TaskType.PROCESS_STRING:
-                result = process_string(data)
-            elif task_type == TaskType.FETCH_DATA:
-                result = fetch_data(data)
+            results = []
+            for index, output in outputs:
+                task = tasks[index]
+                results.append({
+                    "seq": index,
+                    "task": task["type"].value,
+                    "input": task["data"],
+                    "output": output,
+                    "worker": worker_name
+                })
+            
+            if ordered:
+                buffered[outputs[0][0] // batch_size] = results
+                buffered_count += len(results)
+                ready = []
+                while next_batch in buffered:
+                    ready.extend(buffered.pop(next_batch))
+                    next_batch += 1
+                    outstanding -= 1
+                buffered_count -= len(ready)
+                if stats is not None:
+                    stats["reorder_peak"] = max(stats["reorder_peak"], buffered_count)
             else:
-                result = None
+                ready = results
+                outstanding -= 1
             
-            result_queue.put({
-                "task": task_type.value,
-                "input": data,
-                "output": result,
-                "worker": mp.current_process().name
-            })
+            # Refill up to the bound before handing results to the caller
+            while outstanding < max_in_flight and submit():
+                outstanding += 1
             
-        except queue.Empty:
-            break
+            for result in ready:
+                if stats is not None and stats["first_result"] is None:
+                    stats["first_result"] = time.perf_counter() - start_time
+                yield result
+        if tracer is not None:
+            tracer.add("collect", collect_start, time.perf_counter())
+        finished = True
+    finally:
+        # Wait for workers to finish (or stop them if the caller gave up)
+        with trace_span(tracer, "join"):
+            if threads is not None:
+                for future in futures:
+                    future.cancel()  # Only affects batches not yet started
+                threads.shutdown(wait=finished)
+            for w in workers:
+                if not finished:
+                    w.terminate()
+                w.join()
 
 
-def parallel_task_processing(tasks: List[Dict], num_workers: int = 4) -> List[Any]:
-    """Process tasks in parallel using worker pool."""
-    # Create queues
-    task_queue = mp.Queue()
-    result_queue = mp.Queue()
+def parallel_task_processing(tasks: List[Dict], num_workers: int = 4,
+                             pool: Optional[WorkerPool] = None,
+                             batch_size: int = 1,
+                             cache: Optional[LRUCache] = None,
+                             tracer: Optional[Tracer] = None,
+                             executor: str = "process",
+                             placement: Placement = None) -> List[Any]:
+    """
+    Process tasks in parallel using worker pool.
     
-    # Add tasks to queue
-    for task in tasks:
-        task_queue.put(task)
+    Tasks travel as compact (index, type id, payload) tuples, grouped into
+    batches of `batch_size` per queue message; for many small tasks this
+    amortizes the per-message IPC and pickling cost.
+    
+    By default fresh worker processes are started for this call. Pass a
+    warm WorkerPool as `pool` to dispatch the batches to its long-lived
+    workers instead (num_workers is then the pool's size).
+    
+    Pass a shared LRUCache (see CacheManager) as `cache` to memoize pure
+    task types across all workers.
+    
+    Pass a Tracer as `tracer` to record the parent's phases (encode,
+    enqueue, spawn, collect, join) and each worker's compute and
+    queue-wait spans (see tracing.py). Worker processes started here
+    also report pickling and unpickling of batches and results as
+    "serialize" spans, on both sides.
+    
+    With executor="thread" the batches run on a ThreadPoolExecutor of
+    num_workers threads instead: nothing is pickled, and sleep- or
+    I/O-bound tasks overlap as well as they do in processes. A plain
+    LRUCache can be passed as `cache` (it is thread-safe).
+    
+    `placement` pins the worker processes started here to CPUs
+    ("compact", "scatter" or a list of CPU ids, see affinity.py); create
+    a WorkerPool with a placement to pin pool workers instead.
+    
+    Results come back in completion order once all are done; use
+    iter_task_results to consume them as they arrive, or in task order.
+    """
+    return list(iter_task_results(tasks, num_workers, pool, batch_size, cache, tracer,
+                                  executor, placement=placement))
+
+
+def benchmark_batching(num_tasks: int = 20000, num_workers: int = 4,
+                       batch_sizes: Tuple[int, ...] = (1, 4, 16, 64, 256)) -> Dict[int, float]:
+    """
+    Throughput (tasks/second) of trivial tasks at several batch sizes.
+    
+    The tasks do almost nothing, so the numbers show the dispatch cost:
+    queue messages, pickling and wakeups, paid once per batch.
+    """
+    tasks = [{"type": MicroTaskType.INCREMENT, "data": i} for i in range(num_tasks)]
+    report = {}
+    with WorkerPool(num_workers) as pool:
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            parallel_task_processing(tasks, num_workers, pool=pool, batch_size=batch_size)
+            report[batch_size] = num_tasks / (time.perf_counter() - start)
+    return report
+
+
+def benchmark_executors(num_tasks: int = 16, num_trivial: int = 20000,
+                        num_workers: int = 4) -> Dict[str, Dict[str, float]]:
+    """
+    Compare process and thread executors on two task mixes.
+    
+    - "sleep-bound": the simulated tasks, which spend their time in
+      time.sleep and release the GIL, so threads overlap them fully
+    - "trivial": increments with no work at all, which measure pure
+      dispatch cost: pickling and queue messages for processes, a
+      function call and a future for threads
+    
+    Returns:
+        Mapping of task mix to the time of each executor
+    """
+    kinds = [TaskType.CALCULATE_SQUARE, TaskType.CALCULATE_CUBE,
+             TaskType.CALCULATE_FACTORIAL, TaskType.FETCH_DATA]
+    mixes = {
+        "sleep-bound": [{"type": kinds[i % len(kinds)], "data": i} for i in range(num_tasks)],
+        "trivial": [{"type": MicroTaskType.INCREMENT, "data": i} for i in range(num_trivial)],
+    }
+    report = {}
+    for name, tasks in mixes.items():
+        batch_size = 1 if name == "sleep-bound" else 64
+        report[name] = {}
+        for executor in EXECUTORS:
+            start = time.perf_counter()
+            parallel_task_processing(tasks, num_workers, batch_size=batch_size,
+                                     executor=executor)
+            report[name][executor] = time.perf_counter() - start
+    return report
+
+
+def benchmark_result_delivery(num_tasks: int = 24, num_workers: int = 4,
+                              windows: Tuple[int, ...] = (2, 8)) -> Dict[str, Dict[str, float]]:
+    """
+    Time-to-first-result and total time for each way of receiving results.
+    
+    Uses fetch_data tasks, whose random latency makes completion order
+    differ from task order. Ordered delivery is run with several
+    max_in_flight bounds to show the reorder buffer's peak size.
+    
+    Returns:
+        Mapping of delivery mode to first_result, total time and
+        reorder_peak
+    """
+    tasks = [{"type": TaskType.FETCH_DATA, "data": i} for i in range(num_tasks)]
+    modes = {"list (parallel_task_processing)": None, "generator, unordered": {}}
+    modes.update({f"generator, ordered, window {w}": {"ordered": True, "max_in_flight": w}
+                  for w in windows})
+    
+    report = {}
+    with WorkerPool(num_workers) as pool:
+        for name, options in modes.items():
+            start = time.perf_counter()
+            if options is None:
+                parallel_task_processing(tasks, num_workers, pool=pool)
+                elapsed = time.perf_counter() - start
+                report[name] = {"first_result": elapsed, "total": elapsed, "reorder_peak": 0}
+                continue
+            stats = {}
+            for _ in iter_task_results(tasks, num_workers, pool=pool, stats=stats, **options):
+                pass
+            report[name] = {"first_result": stats["first_result"],
+                            "total": time.perf_counter() - start,
+                            "reorder_peak": stats["reorder_peak"]}
+    return report
+
+
+def benchmark_caching(num_tasks: int = 40, distinct_inputs: int = 5,
+                      num_workers: int = 4, max_entries: int = 8) -> Dict[str, Any]:
+    """
+    Compare a repetitive task stream with and without the shared cache.
+    
+    Inputs repeat heavily (num_tasks drawn from distinct_inputs values
+    per pure type), with some fetch_data tasks that are never cached.
+    
+    Returns:
+        Times without and with the cache, plus the cache counters
+    """
+    rng = random.Random(42)
+    kinds = [TaskType.CALCULATE_SQUARE, TaskType.CALCULATE_CUBE,
+             TaskType.CALCULATE_FACTORIAL, TaskType.FETCH_DATA]
+    tasks = [{"type": rng.choice(kinds), "data": rng.randrange(distinct_inputs)}
+             for _ in range(num_tasks)]
+    
+    start = time.perf_counter()
+    parallel_task_processing(tasks, num_workers)
+    uncached = time.perf_counter() - start
+    
+    with CacheManager() as manager:
+        cache = manager.LRUCache(max_entries)
+        start = time.perf_counter()
+        parallel_task_processing(tasks, num_workers, cache=cache)
+        cached = time.perf_counter() - start
+        stats = cache.stats()
+    return {"uncached_time": uncached, "cached_time": cached, "cache": stats}
+
+
+class TaskDeques:
+    """
+    Per-worker double-ended task queues in shared memory.
+    
+    All deques live in one shared array of task indices; worker w owns
+    the segment between heads[w] and tails[w]. The owner pops from the
+    tail (most recently queued, cache-warm work) while thieves take from
+    the head, so a thief takes the work the owner would reach last.
+    Each deque has one lock, taken by pop() and steal() alike, so the
+    owner and thieves of a deque contend on every access; workers on
+    different deques never do, unlike with one lock for the whole pool.
+    """
+    
+    def __init__(self, assignment: List[List[int]]):
+        total = sum(len(indices) for indices in assignment)
+        self.slots = mp.Array("i", max(total, 1), lock=False)
+        self.heads = mp.Array("i", len(assignment), lock=False)
+        self.tails = mp.Array("i", len(assignment), lock=False)
+        self.locks = [mp.Lock() for _ in assignment]
+        
+        offset = 0
+        for w, indices in enumerate(assignment):
+            self.heads[w] = offset
+            for index in indices:
+                self.slots[offset] = index
+                offset += 1
+            self.tails[w] = offset
+    
+    def pop(self, w: int) -> Optional[int]:
+        """Owner side: take the newest task from the tail of deque w."""
+        with self.locks[w]:
+            if self.tails[w] > self.heads[w]:
+                self.tails[w] -= 1
+                return self.slots[self.tails[w]]
+        return None
+    
+    def steal(self, victim: int) -> Optional[int]:
+        """Thief side: take the oldest task from the head of a victim's deque."""
+        with self.locks[victim]:
+            if self.tails[victim] > self.heads[victim]:
+                self.heads[victim] += 1
+                return self.slots[self.heads[victim] - 1]
+        return None
+
+
+def assign_tasks(num_tasks: int, num_workers: int, initial: str = "block") -> List[List[int]]:
+    """
+    Initial distribution of task indices over the worker deques.
+    
+    "block" gives each worker a contiguous range, so clustered expensive
+    tasks end up on few workers; "round_robin" deals them out in turn.
+    """
+    if initial == "round_robin":
+        return [list(range(w, num_tasks, num_workers)) for w in range(num_workers)]
+    if initial == "block":
+        size, extra = divmod(num_tasks, num_workers)
+        assignment, start = [], 0
+        for w in range(num_workers):
+            end = start + size + (1 if w < extra else 0)
+            assignment.append(list(range(start, end)))
+            start = end
+        return assignment
+    raise ValueError(f"Unknown initial distribution {initial!r}")
+
+
+def work_stealing_worker(worker_id: int, tasks: List[Dict], deques: TaskDeques,
+                         result_queue: mp.Queue, steal: bool = True, seed: int = 0):
+    """
+    Worker loop of the work-stealing scheduler.
     
-    # Add poison pills to stop workers
-    for _ in range(num_workers):
-        task_queue.put(None)
+    Runs tasks from its own deque; when that is empty it tries the other
+    deques in random order. Tasks are never added after start-up, so a
+    worker that finds every deque empty can safely exit: no timeouts.
+    Sends one ("stats", ...) message with its counters before exiting.
+    """
+    rng = random.Random(seed + worker_id)
+    num_workers = len(deques.locks)
+    name = mp.current_process().name
+    stats = {"worker": name, "tasks": 0, "stolen": 0, "steal_attempts": 0,
+             "busy_time": 0.0}
+    start = time.perf_counter()
+    
+    while True:
+        index = deques.pop(worker_id)
+        stolen = False
+        if index is None and steal:
+            victims = [v for v in range(num_workers) if v != worker_id]
+            rng.shuffle(victims)
+            for victim in victims:
+                stats["steal_attempts"] += 1
+                index = deques.steal(victim)
+                if index is not None:
+                    stolen = True
+                    break
+        if index is None:
+            break
+        
+        task_start = time.perf_counter()
+        result = sequential_task_processing([tasks[index]])[0]
+        stats["busy_time"] += time.perf_counter() - task_start
+        stats["tasks"] += 1
+        stats["stolen"] += stolen
+        
+        result.update({"index": index, "worker": name, "stolen": stolen})
+        result_queue.put(("result", result))
+    
+    stats["wall_time"] = time.perf_counter() - start
+    result_queue.put(("stats", stats))
+
+
+def work_stealing_task_processing(tasks: List[Dict], num_workers: int = 4,
+                                  initial: str = "block",
+                                  steal: bool = True) -> Tuple[List[Any], List[Dict]]:
+    """
+    Process tasks with per-worker deques and work stealing.
+    
+    Args:
+        tasks: Task dicts, as for parallel_task_processing
+        num_workers: Number of worker processes (one deque each)
+        initial: Initial distribution, "block" or "round_robin"
+        steal: Disable to get a static schedule for comparison
+        
+    Returns:
+        Tuple of (results, per-worker stats). Each stats dict has the
+        task and steal counts, busy time and utilization (busy time over
+        the makespan of the whole job).
+    """
+    start = time.perf_counter()
+    deques = TaskDeques(assign_tasks(len(tasks), num_workers, initial))
+    result_queue = mp.Queue()
     
-    # Create and start workers
     workers = []
     for i in range(num_workers):
-        w = mp.Process(target=worker, args=(task_queue, result_queue))
+        w = mp.Process(target=work_stealing_worker,
+                       args=(i, tasks, deques, result_queue, steal))
         w.start()
         workers.append(w)
     
-    # Collect results
-    results = []
-    for _ in range(len(tasks)):
-        result = result_queue.get()
-        results.append(result)
+    # Drain the queue before joining so workers never block on a full pipe
+    results, worker_stats = [], []
+    while len(worker_stats) < num_workers:
+        kind, payload = result_queue.get()
+        if kind == "result":
+            results.append(payload)
+        else:
+            worker_stats.append(payload)
     
-    # Wait for workers to finish
     for w in workers:
         w.join()
     
-    return results
+    makespan = time.perf_counter() - start
+    for stats in worker_stats:
+        stats["utilization"] = stats["busy_time"] / makespan if makespan > 0 else 0.0
+    return results, worker_stats
+
+
+def benchmark_scheduling(num_tasks: int = 24, num_workers: int = 4) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare the central queue with work stealing on heterogeneous tasks.
+    
+    Expensive factorials are clustered at the front of the task list, so
+    a block distribution with no stealing leaves most workers idle while
+    one grinds through them.
+    
+    Returns:
+        Mapping of scheduler name to its time and per-worker stats
+    """
+    heavy = num_tasks // 3
+    tasks = ([{"type": TaskType.CALCULATE_FACTORIAL, "data": 20}] * heavy +
+             [{"type": TaskType.PROCESS_STRING, "data": "task"}] * (num_tasks - heavy))
+    
+    report = {}
+    start = time.perf_counter()
+    parallel_task_processing(tasks, num_workers)
+    report["central_queue"] = {"time": time.perf_counter() - start, "workers": []}
+    
+    for name, steal in [("static_deques", False), ("work_stealing", True)]:
+        start = time.perf_counter()
+        _, worker_stats = work_stealing_task_processing(tasks, num_workers, "block", steal)
+        report[name] = {"time": time.perf_counter() - start, "workers": worker_stats}
+    return report
 
 
 def demonstrate_task_parallelism():
@@ -207,6 +885,48 @@ def demonstrate_task_parallelism():
     print(f"   Time: {par_time:.3f} seconds")
     print(f"   Speedup: {seq_time / par_time:.2f}x")
     
+    with WorkerPool(num_workers) as pool:
+        start = time.time()
+        parallel_task_processing(tasks, num_workers, pool=pool)
+        warm_time = time.time() - start
+    print(f"   Persistent pool startup: {pool.startup_time:.3f} seconds")
+    print(f"   Persistent pool steady-state time: {warm_time:.3f} seconds")
+    
+    stats = {}
+    start = time.time()
+    list(iter_task_results(tasks, num_workers, stats=stats, placement="compact"))
+    print(f"   Compact placement: {time.time() - start:.3f} seconds")
+    print(f"   Worker affinity: {format_affinity(stats['affinity'])}")
+    
+    print("\n   Batched dispatch of trivial tasks (registry + compact encoding):")
+    print("   Batch size | Tasks/s")
+    print("   " + "-" * 22)
+    for batch_size, throughput in benchmark_batching(20000, num_workers).items():
+        print(f"   {batch_size:10d} | {throughput:9.0f}")
+    
+    print("\n   Shared LRU result cache on a repetitive stream (40 tasks, 5 inputs):")
+    report = benchmark_caching(40, 5, num_workers)
+    stats = report["cache"]
+    print(f"   Without cache: {report['uncached_time']:.3f} seconds")
+    print(f"   With cache:    {report['cached_time']:.3f} seconds")
+    print(f"   Hits: {stats['hits']}, misses: {stats['misses']}, "
+          f"evictions: {stats['evictions']} (max {stats['max_entries']} entries)")
+    
+    state = "disabled" if not gil_enabled() else "enabled"
+    build = "free-threaded" if free_threaded_build() else "standard"
+    print(f"\n   Processes vs threads ({build} build, GIL {state}):")
+    print("   Task mix    | Processes (s) | Threads (s)")
+    print("   " + "-" * 40)
+    for mix, times in benchmark_executors(16, 20000, num_workers).items():
+        print(f"   {mix:11s} | {times['process']:13.3f} | {times['thread']:11.3f}")
+    
+    print("\n   Result delivery (24 fetch_data tasks, iter_task_results):")
+    print("   Mode                            | First (s) | Total (s) | Reorder peak")
+    print("   " + "-" * 70)
+    for mode, stats in benchmark_result_delivery(24, num_workers).items():
+        print(f"   {mode:31s} | {stats['first_result']:9.3f} | {stats['total']:9.3f} | "
+              f"{stats['reorder_peak']:12d}")
+    
     print("\n5. Worker Distribution:")
     worker_counts = {}
     for result in par_results:
@@ -269,6 +989,7 @@ def compare_with_data_parallelism():
     print("    • Task 1: Decode frames (data parallel per frame)")
     print("    • Task 2: Apply filters (data parallel per pixel)")
     print("    • Task 3: Encode frames (data parallel per frame)")
+    print("  (pipeline_demo.py runs this pipeline with bounded queues between stages)")
 
 
 def demonstrate_dynamic_task_generation():
@@ -282,6 +1003,16 @@ def demonstrate_dynamic_task_generation():
     print("   - Idle workers steal tasks from busy workers")
     print("   - Dynamic load balancing for uneven workloads")
     
+    num_workers = min(4, mp.cpu_count())
+    print(f"\n   Clustered heavy tasks, {num_workers} workers:")
+    report = benchmark_scheduling(24, num_workers)
+    for name, entry in report.items():
+        print(f"   {name:14s}: {entry['time']:.3f} seconds")
+    print("   Work-stealing workers:")
+    for stats in report["work_stealing"]["workers"]:
+        print(f"     {stats['worker']}: {stats['tasks']:2d} tasks, "
+              f"{stats['stolen']:2d} stolen, {stats['utilization'] * 100:5.1f}% busy")
+    
     print("\n2. Task Dependencies:")
     print("   - Some tasks depend on others' results")
     print("   - Represented as directed acyclic graph (DAG)")
@@ -325,5 +1056,5 @@ if __name__ == "__main__":
     print("1. Add new task types with different computations")
     print("2. Implement work stealing for better load balancing")
     print("3. Add task dependencies (DAG execution)")
-    print("4. Compare with threading instead of multiprocessing")
-    print("5. Measure overhead of task queue management")
\ No newline at end of file
+    print("4. Run CPU-bound tasks with executor=\"thread\" on a free-threaded build")
+    print("5. Measure overhead of task queue management (see dispatch_overhead.py)")
\ No newline at end of file
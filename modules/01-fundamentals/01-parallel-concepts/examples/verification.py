@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Chunked Result Verification
+
+Checking a parallel run with `assert seq_result == par_result` keeps two
+full outputs alive (twice the memory) and walks both in Python. Here
+each worker digests the chunks it produces instead, and the run is
+verified against a reference digest:
+
+1. digest_chunk reduces one output chunk to a ChunkDigest: a CRC-32 of
+   its float64 bytes (exact), or a few sums that are compared with a
+   tolerance (for kernels whose rounding may differ)
+2. A Digest collects the chunk digests of one run, keyed by chunk start
+3. digest_result / digest_stream build the reference one chunk at a
+   time, so the reference output never has to coexist with the
+   parallel one
+
+CRC-32 runs at several GB/s and is meant to catch bugs, not tampering;
+a chunk-level collision has odds of about 1 in 4 billion.
+
+A Digest created with `reference=` checks each chunk as it is added,
+which verifies streamed runs whose output is never held at all.
+
+Digests are compared chunk by chunk, so the reference must use the same
+chunk boundaries (Digest.ranges() gives them).
+"""
+
+import math
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the "python" backend needs only the stdlib
+    np = None
+
+
+class ChunkDigest(NamedTuple):
+    """Digest of output[start:start + count]."""
+    start: int
+    count: int
+    # CRC-32 of the float64 bytes, or (sum, sum of squares,
+    # index-weighted sum) in tolerance mode
+    value: Union[int, Tuple[float, float, float]]
+
+
+def _float64_buffer(values):
+    """values as an object exposing contiguous float64 bytes."""
+    if np is not None and isinstance(values, np.ndarray):
+        return np.ascontiguousarray(values, dtype=np.float64)
+    if isinstance(values, array) and values.typecode == "d":
+        return values
+    return array("d", values)
+
+
+def _moments(values) -> Tuple[float, float, float]:
+    """Sum, sum of squares and index-weighted sum (catches reordering)."""
+    if np is not None and isinstance(values, np.ndarray):
+        x = np.asarray(values, dtype=np.float64)
+        return float(x.sum()), float(x @ x), float(np.arange(len(x)) @ x)
+    return (math.fsum(values), math.fsum(x * x for x in values),
+            math.fsum(k * x for k, x in enumerate(values)))
+
+
+def digest_chunk(values, start: int = 0, tolerance: Optional[float] = None) -> ChunkDigest:
+    """
+    Digest one output chunk (list, array('d'), memoryview or ndarray).
+
+    With tolerance=None the digest is a checksum of the exact float64
+    bytes, the same check as comparing the values with == (up to
+    checksum collisions). With a tolerance it holds three sums,
+    compared with math.isclose.
+    """
+    if tolerance is None:
+        return ChunkDigest(start, len(values), zlib.crc32(_float64_buffer(values)))
+    return ChunkDigest(start, len(values), _moments(values))
+
+
+def _chunks_match(a: ChunkDigest, b: ChunkDigest, tolerance: Optional[float]) -> bool:
+    if a.count != b.count or isinstance(a.value, int) != isinstance(b.value, int):
+        return False
+    if isinstance(a.value, int):
+        return a.value == b.value
+    return all(math.isclose(x, y, rel_tol=tolerance, abs_tol=tolerance)
+               for x, y in zip(a.value, b.value))
+
+
+class Digest:
+    """
+    Chunk digests of one run, keyed by chunk start.
+
+    Example:
+        digests = Digest()
+        parallel_processing(data, 2.5, digests=digests)
+        reference = digest_result(sequential_processing(data, 2.5), digests.ranges())
+        assert digests.matches(reference)
+
+    With `reference`, every added chunk is checked on arrival and the
+    starts of failing chunks are collected in `mismatches`.
+    """
+
+    def __init__(self, tolerance: Optional[float] = None,
+                 reference: Optional["Digest"] = None):
+        if tolerance is None and reference is not None:
+            tolerance = reference.tolerance
+        self.tolerance = tolerance
+        self.reference = reference
+        self.chunks: Dict[int, ChunkDigest] = {}
+        self.mismatches: List[int] = []
+
+    def add(self, chunk: ChunkDigest) -> None:
+        """Record a chunk digest (and check it if there is a reference)."""
+        self.chunks[chunk.start] = chunk
+        if self.reference is not None and not self.reference.chunk_matches(chunk, self.tolerance):
+            self.mismatches.append(chunk.start)
+
+    @property
+    def count(self) -> int:
+        """Number of elements covered."""
+        return sum(chunk.count for chunk in self.chunks.values())
+
+    def ranges(self) -> List[Tuple[int, int]]:
+        """(start, end) of every chunk, in order."""
+        return [(start, start + self.chunks[start].count) for start in sorted(self.chunks)]
+
+    def chunk_matches(self, chunk: ChunkDigest, tolerance: Optional[float] = None) -> bool:
+        """Whether this digest has a matching chunk at chunk.start."""
+        expected = self.chunks.get(chunk.start)
+        if tolerance is None:
+            tolerance = self.tolerance
+        return expected is not None and _chunks_match(expected, chunk, tolerance)
+
+    def compare(self, other: "Digest") -> List[int]:
+        """Starts of chunks that differ or exist in only one digest."""
+        return [start for start in sorted(set(self.chunks) | set(other.chunks))
+                if start not in self.chunks
+                or not other.chunk_matches(self.chunks[start], self.tolerance)]
+
+    def matches(self, other: "Digest") -> bool:
+        """True if both digests cover the same chunks with matching contents."""
+        return not self.compare(other)
+
+
+def digest_result(result, ranges: Sequence[Tuple[int, int]],
+                  tolerance: Optional[float] = None) -> Digest:
+    """Digest a full output over the given chunk ranges (e.g. another Digest's)."""
+    digests = Digest(tolerance)
+    for start, end in ranges:
+        digests.add(digest_chunk(result[start:end], start, tolerance))
+    return digests
+
+
+def digest_stream(chunks: Iterable, tolerance: Optional[float] = None) -> Digest:
+    """Digest output chunks arriving in order, holding one at a time."""
+    digests = Digest(tolerance)
+    start = 0
+    for chunk in chunks:
+        digests.add(digest_chunk(chunk, start, tolerance))
+        start += len(chunk)
+    return digests
+
+
+def benchmark_verification(n: int = 2000000, chunks: int = 8,
+                           backend: str = "python") -> Dict[str, float]:
+    """
+    Time a full == comparison against digesting one output.
+
+    Digesting runs once per output (in the workers, in parallel, for a
+    real run); the full comparison needs both outputs in memory.
+
+    Returns:
+        Mapping of method to seconds
+    """
+    if backend == "numpy":
+        a = np.random.default_rng(42).random(n)
+        b = a.copy()
+    else:
+        a = array("d", range(n)).tolist()
+        b = [x + 0.0 for x in a]  # Equal values, distinct objects (as from a second run)
+    size = -(-n // chunks)
+    ranges = [(start, min(start + size, n)) for start in range(0, n, size)]
+
+    report = {}
+    start = time.perf_counter()
+    equal = bool(np.array_equal(a, b)) if backend == "numpy" else a == b
+    report["full comparison"] = time.perf_counter() - start
+    for label, tolerance in (("exact digest", None), ("tolerance digest", 1e-9)):
+        start = time.perf_counter()
+        digest = digest_result(a, ranges, tolerance)
+        report[label] = time.perf_counter() - start
+        assert equal and digest.matches(digest_result(b, ranges, tolerance))
+    return report
+
+
+def demonstrate_verification():
+    """Compare verification costs and show mismatches being located."""
+    print("=" * 60)
+    print("CHUNKED RESULT VERIFICATION")
+    print("=" * 60)
+
+    backends = ["python"] + (["numpy"] if np is not None else [])
+    for backend in backends:
+        print(f"\n{backend} backend, 2,000,000 values in 8 chunks:")
+        print("   Method             | Time (s)")
+        print("   " + "-" * 30)
+        for method, seconds in benchmark_verification(backend=backend).items():
+            print(f"   {method:18s} | {seconds:8.4f}")
+
+    print("\nLocating wrong elements (1,000 values in chunks of 250):")
+    good = [float(i) for i in range(1000)]
+    ranges = [(start, start + 250) for start in range(0, 1000, 250)]
+    for error in (1e-9, 1.0):
+        bad = list(good)
+        bad[612] += error
+        exact = digest_result(bad, ranges).compare(digest_result(good, ranges))
+        loose = digest_result(bad, ranges, 1e-6).compare(digest_result(good, ranges, 1e-6))
+        print(f"   Element 612 off by {error:g}: exact digest flags chunks {exact}, "
+              f"tolerance 1e-6 flags {loose}")
+
+
+if __name__ == "__main__":
+    demonstrate_verification()
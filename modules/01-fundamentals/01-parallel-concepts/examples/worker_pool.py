@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Persistent Worker Pool
+
+A long-lived process pool shared by the data and task parallelism demos.
+
+Creating an mp.Pool spawns processes and (with the spawn/forkserver start
+methods) re-imports modules in each of them. When a fresh pool is created
+for every measurement, that startup cost ends up in the "parallel time".
+WorkerPool pays it once, warms every worker up, and keeps startup cost and
+steady-state work separate so both can be reported.
+
+It also holds the helpers for the "thread" executor, which the demos
+offer as an alternative to worker processes.
+
+With a placement (see affinity.py) every worker is pinned to one CPU as
+it starts, and the resulting affinity map is kept for reports.
+"""
+
+import os
+import sys
+import sysconfig
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import resource_tracker
+from multiprocessing.pool import Pool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from affinity import Placement, pin_pool_worker, placement_cpus
+
+
+# Where the demos run their workers: separate processes (separate memory,
+# arguments pickled) or threads of this process (shared memory, no
+# pickling, but Python bytecode serialized by the GIL unless the kernel
+# releases it or the interpreter is a free-threaded build)
+EXECUTORS = ("process", "thread")
+
+
+def check_executor(executor: str) -> None:
+    """Raise if the requested executor is unknown."""
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {EXECUTORS}")
+
+
+def free_threaded_build() -> bool:
+    """True if this interpreter was built without the GIL (PEP 703, "3.13t")."""
+    return bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+
+
+def gil_enabled() -> bool:
+    """
+    True if the GIL is active right now.
+
+    A free-threaded build can still turn the GIL back on (PYTHON_GIL=1, or
+    importing an extension that does not declare free-threading support).
+    """
+    check = getattr(sys, "_is_gil_enabled", None)
+    return True if check is None else check()
+
+
+def current_worker_name() -> str:
+    """Name of the calling worker: its thread name in a thread pool, else its process name."""
+    thread = threading.current_thread()
+    if thread is threading.main_thread():
+        return mp.current_process().name
+    return thread.name
+
+
+def _warmup_task(delay: float) -> int:
+    """Tiny task that keeps a worker busy briefly so every worker gets one."""
+    time.sleep(delay)
+    return os.getpid()
+
+
+class WorkerPool:
+    """
+    A warm, resizable process pool.
+
+    Usage:
+        with WorkerPool(4) as pool:
+            print(f"startup: {pool.startup_time:.3f} s")
+            parallel_processing(data, 2.5, 4, pool=pool)
+            pool.resize(2)
+            parallel_processing(data, 2.5, 2, pool=pool)
+
+    Attributes:
+        num_workers: Current number of worker processes
+        placement: None, "compact", "scatter" or a list of CPU ids
+        affinity: Worker name -> CPUs it may run on, recorded at start
+        startup_time: Seconds spent on the most recent start (spawn + warmup)
+        total_startup_time: Seconds spent on all starts since creation
+    """
+
+    def __init__(self, num_workers: Optional[int] = None, warmup: bool = True,
+                 placement: Placement = None):
+        self.num_workers = num_workers or mp.cpu_count()
+        self.warmup = warmup
+        self.placement = placement
+        self.affinity: Dict[str, Optional[List[int]]] = {}
+        self.startup_time = 0.0
+        self.total_startup_time = 0.0
+        self._pool = None
+
+    @property
+    def pool(self) -> Pool:
+        """The underlying mp.Pool, started on first use."""
+        if self._pool is None:
+            self.start()
+        return self._pool
+
+    def start(self) -> float:
+        """
+        Start the worker processes and run one warmup task on each.
+
+        Returns:
+            Startup time in seconds
+        """
+        if self._pool is not None:
+            return 0.0
+
+        start = time.perf_counter()
+        # Start the resource tracker before forking so workers share it;
+        # otherwise each worker starts its own and reports shared memory
+        # segments it attached to as leaked when the pool shuts down
+        resource_tracker.ensure_running()
+        # Every worker pins itself (if there is a placement) and reports
+        # its affinity; reading the reports waits for all of them to start
+        counter = mp.Value("i", 0)
+        reports = mp.SimpleQueue()
+        self._pool = mp.Pool(processes=self.num_workers, initializer=pin_pool_worker,
+                             initargs=(placement_cpus(self.num_workers, self.placement),
+                                       counter, reports))
+        affinity = dict(reports.get() for _ in range(self.num_workers))
+        failed = [(name, exc) for name, exc in affinity.items() if isinstance(exc, Exception)]
+        if failed:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            name, exc = failed[0]
+            raise RuntimeError(f"{name} could not be pinned: {exc}") from exc
+        self.affinity = affinity
+        if self.warmup:
+            # Forces process creation and module imports in every worker
+            self._pool.map(_warmup_task, [0.01] * self.num_workers, chunksize=1)
+        self.startup_time = time.perf_counter() - start
+        self.total_startup_time += self.startup_time
+        return self.startup_time
+
+    def resize(self, num_workers: int) -> float:
+        """
+        Change the number of workers, restarting the pool only if needed.
+
+        Returns:
+            Startup time in seconds (0.0 if the size did not change)
+        """
+        if num_workers == self.num_workers and self._pool is not None:
+            return 0.0
+        self.close()
+        self.num_workers = num_workers
+        return self.start()
+
+    def starmap(self, func: Callable, iterable: Iterable, chunksize: Optional[int] = None) -> List[Any]:
+        """Same as mp.Pool.starmap, on the warm workers."""
+        return self.pool.starmap(func, iterable, chunksize)
+
+    def map(self, func: Callable, iterable: Iterable, chunksize: Optional[int] = None) -> List[Any]:
+        """Same as mp.Pool.map, on the warm workers."""
+        return self.pool.map(func, iterable, chunksize)
+
+    def imap_unordered(self, func: Callable, iterable: Iterable, chunksize: int = 1) -> Iterator[Any]:
+        """Same as mp.Pool.imap_unordered, on the warm workers."""
+        return self.pool.imap_unordered(func, iterable, chunksize)
+
+    def apply_async(self, func: Callable, args: tuple = (), callback: Optional[Callable] = None,
+                    error_callback: Optional[Callable] = None):
+        """Same as mp.Pool.apply_async, on the warm workers."""
+        return self.pool.apply_async(func, args, callback=callback,
+                                     error_callback=error_callback)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    print(f"System has {mp.cpu_count()} CPU cores")
+
+    print("\nPool startup cost (spawn + warmup):")
+    print("Workers | Startup (s)")
+    print("-" * 22)
+    with WorkerPool(1) as pool:
+        for workers in [1, 2, 4]:
+            startup = pool.resize(workers) or pool.startup_time
+            print(f"{workers:7d} | {startup:11.3f}")
+    print(f"\nTotal startup time: {pool.total_startup_time:.3f} seconds")